@@ -11,19 +11,49 @@ USERNAME = "usuario"     # Usuario por defecto de Ubiquiti
 PASSWORD = "tupass"   # Cambiar a tu contraseña real
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connection import HTTPConnection
+import urllib3
 import time
 import logging
-import json
 import random
 import sys
 import os
 import re
+import json
+import socket
+import ssl
+import signal
+import threading
+from types import MappingProxyType
 from datetime import datetime
-from bs4 import BeautifulSoup
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, Future
+from functools import lru_cache
+from collections import deque
+from lxml import etree, html as lxml_html
+
+# orjson o ujson (opcionales) analizan el JSON directamente desde bytes y son bastante más
+# rápidos; si no están instalados se usa el módulo json estándar. Todos lanzan ValueError
+# ante JSON inválido.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+    except ImportError:
+        _json_loads = json.loads
+
+# Los equipos usan certificados autofirmados: deshabilitar las advertencias SSL una sola vez
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Directorio del script, donde se guardan el log y los volcados de depuración
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Configuración de logging
-log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frequency_switcher.log')
+log_file = os.path.join(_SCRIPT_DIR, 'frequency_switcher.log')
 logging.basicConfig(
     filename=log_file,
     level=logging.INFO,
@@ -38,47 +68,305 @@ console.setFormatter(formatter)
 logging.getLogger('').addHandler(console)
 
 # Lista de frecuencias disponibles (en MHz)
-AVAILABLE_FREQUENCIES = [5665, 5675, 5685, 5695, 5710, 5760, 5780, 5830, 5835]
+AVAILABLE_FREQUENCIES = (5665, 5675, 5685, 5695, 5710, 5760, 5780, 5830, 5835)
+_FREQ_SET = frozenset(AVAILABLE_FREQUENCIES)
+
+# Alternativas a cada frecuencia (todas las configuradas menos ella misma)
+_NEIGHBORS = {f: tuple(x for x in AVAILABLE_FREQUENCIES if x != f) for f in AVAILABLE_FREQUENCIES}
 
 # Umbrales de calidad para cambio de frecuencia
 SIGNAL_THRESHOLD = -70       # dBm - Si la señal cae debajo de este valor
 CCQ_THRESHOLD = 70           # % - Si la calidad de conexión cae debajo de este valor
 TX_CAPACITY_THRESHOLD = 50   # % - Si la capacidad de transmisión cae debajo de este %
 
+# Umbrales evaluados en cada verificación: (clave de estado, nombre, umbral, unidad).
+# Se guardan como float para compararlos con los valores del dispositivo sin mezclar tipos.
+_THRESHOLDS = (
+    ("signal_level", "Señal", float(SIGNAL_THRESHOLD), " dBm"),
+    ("ccq", "CCQ", float(CCQ_THRESHOLD), "%"),
+    ("tx_capacity", "Capacidad TX", float(TX_CAPACITY_THRESHOLD), "%"),
+)
+
+# Mensaje para un valor por debajo de su umbral (lo comparten el monitoreo y --status)
+_THRESHOLD_MSG = "{label} ({value}{unit}) por debajo del umbral ({threshold:g}{unit})"
+
 # Período entre verificaciones (en segundos)
 CHECK_INTERVAL = 300  # 5 minutos
 
-# Función mejorada para obtener el estado del dispositivo
-def get_device_status(ip_address, username, password):
+# Tiempo máximo para comprobar que un dispositivo acepta conexiones (en segundos)
+TCP_PROBE_TIMEOUT = 2
+
+# Tiempo máximo para establecer cada conexión HTTPS (en segundos); cada petición
+# indica aparte su tiempo máximo de lectura, ya que algunos CGI tardan en responder
+CONNECT_TIMEOUT = 3
+
+# Vigencia del estado en caché de cada dispositivo (en segundos)
+STATUS_CACHE_TTL = 5
+
+# Elegir la nueva frecuencia con un site survey del radio maestro (desactivado por defecto:
+# no todos los firmwares exponen survey.json.cgi y el escaneo puede interrumpir el enlace)
+USE_SITE_SURVEY = os.environ.get("FREQSWITCH_SURVEY") == "1"
+SURVEY_CHANNEL_SPACING = 20  # MHz - Redes más cercanas que esto se consideran interferencia
+
+# Tiempo máximo para confirmar un cambio de frecuencia (en segundos)
+VERIFY_TIMEOUT = 90
+
+# Límites del intervalo adaptativo: se acorta cerca de los umbrales y se alarga con el enlace estable
+MIN_CHECK_INTERVAL = int(os.environ.get("FREQSWITCH_MIN_INTERVAL", 30))    # segundos
+MAX_CHECK_INTERVAL = int(os.environ.get("FREQSWITCH_MAX_INTERVAL", 900))   # segundos
+
+# Espera hasta la verificación que confirma el enlace tras un cambio de frecuencia (en segundos)
+SWITCH_CONFIRM_DELAY = 20
+
+# Estado del monitoreo (fallos consecutivos, frecuencia, último cambio) que sobrevive a reinicios
+# del servicio; se descarta si es más antiguo que el intervalo máximo entre verificaciones
+_STATE_FILE = os.path.join(_SCRIPT_DIR, 'frequency_switcher_state.json')
+_STATE_MAX_AGE = 2 * MAX_CHECK_INTERVAL   # segundos
+
+# Expresiones regulares precompiladas (sobre bytes en minúsculas) para extraer datos de páginas HTML/JavaScript.
+# Las variantes de cada campo se combinan en una sola alternancia para recorrer el texto una vez.
+_SIGNAL_RE = re.compile(
+    rb'signal["\s:=]+(-?\d+\.?\d*)'
+    rb'|signal.*?(-\d+\.?\d*)\s*dbm'
+    rb'|signal.*?(-\d+\.?\d*)'
+    rb'|>\s*signal\s*<.*?>(-\d+\.?\d*)\s*dbm<'
+    rb'|siglevel.*?(-\d+\.?\d*)'
+)
+_CCQ_RE = re.compile(
+    rb'ccq["\s:=]+(\d+\.?\d*)'
+    rb'|ccq.*?(\d+\.?\d*)%'
+    rb'|>\s*ccq\s*<.*?>(\d+\.?\d*)%<'
+    rb'|qualitylevel.*?(\d+\.?\d*)'
+)
+_FREQ_RE = re.compile(
+    rb'frequency["\s:=]+"?(\d+\.?\d*)(?:\s*mhz)?'
+    rb'|>\s*frequency\s*<.*?>(\d+\.?\d*)\s*mhz<'
+    rb'|freq.*?(\d+\.?\d*)\s*mhz'
+    rb'|channel.*?(\d+\.?\d*)\s*mhz'
+)
+_NOISE_RE = re.compile(
+    rb'noisef["\s:=]+(-?\d+\.?\d*)'
+    rb'|noise.*?(-\d+\.?\d*)\s*dbm'
+)
+_TXPOWER_RE = re.compile(
+    rb'txpower["\s:=]+(\d+\.?\d*)'
+    rb'|tx\s*power.*?(\d+\.?\d*)\s*dbm'
+)
+
+# Patrón de respaldo para cada clave de device_status
+_PATTERNS = {
+    "signal_level": _SIGNAL_RE,
+    "ccq": _CCQ_RE,
+    "frequency": _FREQ_RE,
+    "noise_floor": _NOISE_RE,
+    "tx_power": _TXPOWER_RE,
+}
+
+# Señal, CCQ y frecuencia etiquetadas en el HTML, capturadas en una sola pasada.
+# Cada grupo con nombre es la clave de device_status y el grupo siguiente su valor;
+# entre la etiqueta y el valor se permiten etiquetas HTML (p. ej. celdas de una tabla).
+_HTML_FIELDS = re.compile(
+    rb'(?P<signal_level>signal(?:[^<>]|<[^>]*>){0,80}?(-?\d+\.?\d*)\s*dbm)'
+    rb'|(?P<ccq>ccq(?:[^<>]|<[^>]*>){0,80}?(\d+\.?\d*)\s*%)'
+    rb'|(?P<frequency>freq(?:[^<>]|<[^>]*>){0,80}?(\d+\.?\d*)\s*mhz)'
+)
+
+# Número al inicio de un valor reportado por el dispositivo (p. ej. "5710 MHz", "-60")
+_NUM_RE = re.compile(r'\s*(-?\d+(?:\.\d+)?)')
+
+# Volcados de respuestas HTTP para diagnóstico (desactivados por defecto).
+# Se activan con FREQSWITCH_DEBUG=1 y se guardan en debug/<ip>/, conservando los más recientes.
+_DEBUG_DUMP = os.environ.get("FREQSWITCH_DEBUG") == "1"
+_DEBUG_KEEP = 50
+_DEBUG_ROOT = os.path.join(_SCRIPT_DIR, "debug")
+
+# Tabla para convertir IPs y rutas en nombres de archivo (un solo translate en C)
+_SLUG_TABLE = str.maketrans('./', '__')
+
+# Función para guardar una respuesta HTTP para diagnóstico
+def _write_debug_file(ip_address, name, content, force=False):
     """
-    Obtiene el estado del dispositivo usando múltiples métodos de extracción y análisis.
-    Utiliza estrategias progresivas para manejar diferentes tipos de respuestas.
+    Guarda el contenido (texto o bytes) en debug/<ip>/<fecha>_<name> si los volcados de depuración
+    están activos (o si force=True), eliminando los archivos más antiguos por encima de _DEBUG_KEEP.
     """
+    if not (_DEBUG_DUMP or force):
+        return
+
+    debug_dir = os.path.join(_DEBUG_ROOT, ip_address.translate(_SLUG_TABLE))
     try:
-        # Deshabilitar advertencias SSL
-        requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
+        os.makedirs(debug_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        with open(os.path.join(debug_dir, f"{timestamp}_{name}"), "wb") as f:
+            f.write(content)
+
+        # Rotar: conservar solo los volcados más recientes
+        dumps = sorted(os.listdir(debug_dir))
+        for old_dump in dumps[:-_DEBUG_KEEP]:
+            os.remove(os.path.join(debug_dir, old_dump))
+    except OSError as e:
+        logging.warning(f"No se pudo guardar el archivo de depuración {name}: {str(e)}")
+
+# Encabezados que imitan un navegador web moderno (compartidos por todas las sesiones)
+_HEADERS = MappingProxyType({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml,application/json;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Pragma": "no-cache",
+    "Cache-Control": "no-cache"
+})
+
+# Tipo de contenido de los formularios enviados al dispositivo; el Referer se añade en cada envío
+_FORM_HEADERS = MappingProxyType({"Content-Type": "application/x-www-form-urlencoded"})
+
+# Endpoints de estado en orden de prioridad: primero todos los endpoints JSON (fase A)
+# y solo después el análisis HTML (fase B)
+_ENDPOINTS = (
+    {"url": "/status.cgi", "method": "get", "parser": "json"},
+    {"url": "/iflist.cgi", "method": "get", "parser": "json"},
+    {"url": "/status.cgi", "method": "get", "parser": "html"},
+    {"url": "/iflist.cgi", "method": "get", "parser": "html"},
+    {"url": "/main.cgi", "method": "get", "parser": "html"},
+    {"url": "/link.cgi", "method": "get", "parser": "html"},
+    {"url": "/", "method": "get", "parser": "html"}
+)
 
-        # Crear una nueva sesión con manejo optimizado de cookies
-        session = requests.Session()
-        session.verify = False  # Deshabilitar verificación SSL
+# Campos del objeto "wireless" de status.cgi: (clave de device_status, clave en el JSON, numérico).
+# Los numéricos se convierten a float al extraerlos (algunos vienen con unidad, p. ej. "5710 MHz")
+_WIRELESS_FIELDS = (
+    ("signal_level", "signal", True),
+    ("ccq", "ccq", True),
+    ("frequency", "frequency", True),
+    ("tx_capacity", "txrate", True),
+    ("channel_width", "chanbw", True),
+    ("noise_floor", "noisef", True),
+    ("distance", "distance", False),
+    ("mode", "mode", False),
+    ("tx_power", "txpower", True),
+)
 
-        # Base URL usando HTTPS
-        base_url = f"https://{ip_address}"
+# Campos que, si faltan en "wireless", se toman de la interfaz ath0 en "interfaces"
+_IFACE_FIELDS = (
+    ("signal_level", "signal"),
+    ("ccq", "ccq"),
+    ("frequency", "frequency"),
+)
 
-        # Establecer encabezados que imitan un navegador web moderno
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml,application/json;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-            "Pragma": "no-cache",
-            "Cache-Control": "no-cache"
-        }
-
-        # PASO 1: Realizar una petición inicial para obtener cualquier token CSRF o cookies
+# Páginas donde puede estar la configuración de frecuencia, en orden de prioridad para PowerBeam M5
+_WIRELESS_URLS = (
+    "/link.cgi",           # Principal para configuración de enlace
+    "/spectral.cgi",       # Análisis espectral y frecuencia
+    "/main.cgi?id=9",      # Página wireless en algunos modelos
+    "/main.cgi",           # Página principal de configuración
+    "/wireless.cgi",       # Configuración wireless alternativa
+    "/advanced.cgi"        # Configuración avanzada
+)
+
+# Nombres comunes de los campos de frecuencia en PowerBeam M5, si el formulario no los revela
+_FREQ_FIELDS_DEFAULT = (
+    'freq', 'frequency', 'chan_freq', 'channel',
+    'chan', 'channelwidth', 'channel_width', 'chanbw'
+)
+
+# Campo oculto con el token CSRF/formulario (se busca directamente sobre los bytes de la respuesta)
+_CSRF_RE = re.compile(
+    rb'<input[^>]+name=["\'](?:csrf_token|token|csrf|_csrf)["\'][^>]+value=["\']([^"\']+)',
+    re.I
+)
+
+# Campos de frecuencia/canal (input o select dentro de un formulario), sin distinguir
+# mayúsculas en el nombre; la búsqueda completa se evalúa en el código C de lxml
+_FREQ_FIELDS_XPATH = etree.XPath(
+    "//form//*[self::input or self::select]"
+    "[contains(translate(@name, 'FREQCHAN', 'freqchan'), 'freq')"
+    " or contains(translate(@name, 'FREQCHAN', 'freqchan'), 'chan')]"
+)
+
+# Acción de un formulario de confirmación tras el cambio de frecuencia
+_CONFIRM_ACTION_RE = re.compile(r'confirm|apply|commit')
+
+# Indicaciones de que el equipo requiere reiniciar la interfaz tras el cambio
+_RESTART_RE = re.compile(rb'restart|reboot|reinicio', re.IGNORECASE)
+
+# Sesiones HTTP persistentes por IP, reutilizadas entre verificaciones para
+# mantener la conexión HTTPS abierta y evitar un login en cada ciclo
+_SESSIONS = {}
+
+# Cuerpo de /status.cgi recibido como redirección del último login de cada IP,
+# junto con el instante en que se recibió; solo se aprovecha mientras es reciente
+_LOGIN_STATUS = {}
+_LOGIN_STATUS_MAX_AGE = 10  # segundos
+
+# Último endpoint que devolvió datos para cada IP; se prueba primero en la siguiente consulta
+_ENDPOINT_CACHE = {}
+
+# Formulario de cambio de frecuencia de cada IP (URL, campos y token CSRF), para no
+# volver a descargar y analizar la página de configuración en cada cambio
+_FORM_CACHE = {}
+
+# Último estado obtenido de cada IP con el instante de la consulta, para no repetir
+# peticiones cuando varias partes del script consultan el mismo equipo en pocos segundos
+_STATUS_CACHE = {}
+
+# Consulta de estado en curso por IP: las llamadas concurrentes al mismo equipo esperan
+# el resultado de esa consulta en lugar de repetir las peticiones
+_STATUS_INFLIGHT = {}
+_STATUS_INFLIGHT_LOCK = threading.Lock()
+
+# Pool para descargar en paralelo los endpoints candidatos cuando aún no se conoce
+# el endpoint que funciona; limitado para no saturar al equipo con peticiones simultáneas
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=3)
+
+# Lock de login por IP: los hilos del pool de descargas comparten la sesión del equipo con
+# el ciclo principal, y dos logins simultáneos sobre la misma sesión mezclarían cookies y tokens
+_LOGIN_LOCKS = {}
+_LOGIN_LOCKS_LOCK = threading.Lock()
+
+# Función para obtener el lock de login de un dispositivo
+def _get_login_lock(ip_address):
+    """
+    Retorna (creándolo si no existe) el lock de login del dispositivo. Es reentrante
+    porque _login se llama a sí misma para el intento de login directo.
+    """
+    with _LOGIN_LOCKS_LOCK:
+        lock = _LOGIN_LOCKS.get(ip_address)
+        if lock is None:
+            lock = _LOGIN_LOCKS[ip_address] = threading.RLock()
+    return lock
+
+# Función para iniciar sesión en el dispositivo
+def _login(session, ip_address, username, password, probe=True):
+    """
+    Realiza el login en el dispositivo sobre la sesión indicada, de a un hilo por equipo.
+    Retorna la respuesta del login si fue exitoso, o None si falló.
+    Con probe=False se omite la petición inicial a la raíz (cookies y token CSRF).
+    """
+    with _get_login_lock(ip_address):
+        return _login_attempt(session, ip_address, username, password, probe)
+
+# Función con el proceso de login (se llama con el lock de login del equipo tomado)
+def _login_attempt(session, ip_address, username, password, probe):
+    """
+    Envía el formulario de login; ver _login.
+    """
+    base_url = f"https://{ip_address}"
+
+    # En un nuevo login (sesión expirada) la sesión ya tiene la cookie del equipo: se envía
+    # el formulario directamente y solo si el equipo lo rechaza se repite con la petición inicial
+    if probe and session.cookies:
+        login_response = _login(session, ip_address, username, password, probe=False)
+        if login_response is not None:
+            return login_response
+        logging.info(f"Login directo rechazado por {ip_address}, repitiendo con la petición inicial...")
+
+    # Realizar una petición inicial para obtener cualquier token CSRF o cookies
+    csrf_token = None
+    if probe:
         try:
-            initial_response = session.get(f"{base_url}/", headers=headers, timeout=10)
+            initial_response = session.get(f"{base_url}/", timeout=(CONNECT_TIMEOUT, 10))
             logging.debug(f"Respuesta inicial: {initial_response.status_code}")
 
             # Actualizar cookies de la sesión
@@ -86,131 +374,370 @@ def get_device_status(ip_address, username, password):
                 for cookie in initial_response.cookies:
                     logging.debug(f"Cookie recibida: {cookie.name}={cookie.value}")
 
-            # Buscar token CSRF si existe en la respuesta inicial
-            csrf_token = None
-            if 'csrf_token' in initial_response.text or 'token' in initial_response.text:
-                soup = BeautifulSoup(initial_response.text, 'html.parser')
-                csrf_input = soup.find('input', {'name': 'csrf_token'}) or soup.find('input', {'name': 'token'})
-                if csrf_input and 'value' in csrf_input.attrs:
-                    csrf_token = csrf_input['value']
-                    logging.debug(f"Token CSRF encontrado: {csrf_token}")
-        except Exception as e:
+            # Buscar token CSRF si existe en la respuesta inicial (una sola pasada sobre los bytes)
+            csrf_match = _CSRF_RE.search(initial_response.content)
+            if csrf_match:
+                csrf_token = csrf_match.group(1).decode('utf-8', errors='replace')
+                logging.debug(f"Token CSRF encontrado: {csrf_token}")
+        except requests.exceptions.RequestException as e:
             logging.warning(f"Error en petición inicial: {str(e)}")
             # Continuamos aunque falle la petición inicial
 
-        # PASO 2: Realizar login con datos precisos
-        login_url = f"{base_url}/login.cgi"
-        login_data = {
-            "username": username,
-            "password": password,
-            "uri": "/status.cgi"  # Redirigir directamente a status.cgi después del login
-        }
+    login_url = f"{base_url}/login.cgi"
+    login_data = {
+        "username": username,
+        "password": password,
+        "uri": "/status.cgi"  # Redirigir directamente a status.cgi después del login
+    }
 
-        # Añadir token CSRF si existe
-        if csrf_token:
-            login_data["csrf_token"] = csrf_token
+    # Añadir token CSRF si existe
+    if csrf_token:
+        login_data["csrf_token"] = csrf_token
 
-        # Configurar encabezados específicos para el formulario de login
-        login_headers = headers.copy()
-        login_headers["Content-Type"] = "application/x-www-form-urlencoded"
-        login_headers["Referer"] = f"{base_url}/"
+    # Encabezados específicos para el formulario de login
+    login_headers = {**_FORM_HEADERS, "Referer": f"{base_url}/"}
 
-        try:
-            login_response = session.post(
-                login_url,
-                data=login_data,
-                headers=login_headers,
-                timeout=15,
-                allow_redirects=True
-            )
+    try:
+        login_response = session.post(
+            login_url,
+            data=login_data,
+            headers=login_headers,
+            timeout=(CONNECT_TIMEOUT, 15),
+            allow_redirects=True
+        )
+
+        logging.debug(f"Login response code: {login_response.status_code}")
+        logging.debug(f"Login redirect URL: {login_response.url}")
+
+        # Verificar si el login fue exitoso
+        login_successful = True
+        if 'login.cgi' in login_response.url or 'login.html' in login_response.url:
+            logging.warning(f"Posible fallo de login: redirigido a {login_response.url}")
+            login_successful = False
+
+        # Comprobar si hay mensaje de error en la respuesta
+        login_body = login_response.content.lower()
+        if b"incorrect" in login_body or b"invalid" in login_body:
+            logging.warning("Posible fallo de login: mensaje de error detectado en la respuesta")
+            login_successful = False
+
+        # Guardar la página de login para diagnóstico
+        _write_debug_file(ip_address, "login.html", login_response.content)
+
+        if not login_successful:
+            if probe:
+                logging.error(f"Login fallido para {ip_address}. Revisar credenciales.")
+            return None
 
-            logging.debug(f"Login response code: {login_response.status_code}")
-            logging.debug(f"Login redirect URL: {login_response.url}")
+        logging.info(f"Login exitoso para {ip_address}")
 
-            # Verificar si el login fue exitoso
-            login_successful = True
-            if 'login.cgi' in login_response.url or 'login.html' in login_response.url:
-                logging.warning(f"Posible fallo de login: redirigido a {login_response.url}")
-                login_successful = False
+        # El login redirige a /status.cgi: se guarda ese cuerpo para que la siguiente
+        # consulta de estado lo use en lugar de volver a pedir la misma URL
+        if login_response.url.split('?', 1)[0].endswith('/status.cgi'):
+            _LOGIN_STATUS[ip_address] = (time.monotonic(), login_response.content)
 
-            # Comprobar si hay mensaje de error en la respuesta
-            if "incorrect" in login_response.text.lower() or "invalid" in login_response.text.lower():
-                logging.warning("Posible fallo de login: mensaje de error detectado en la respuesta")
-                login_successful = False
+        return login_response
 
-            # Guardar la página de login para diagnóstico
-            debug_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                      f"debug_login_{ip_address.replace('.', '_')}.html")
-            with open(debug_file, "w", encoding="utf-8") as f:
-                f.write(login_response.text)
+    except Exception as e:
+        logging.error(f"Error en proceso de login: {str(e)}")
+        return None
 
-            if not login_successful:
-                logging.error(f"Login fallido para {ip_address}. Revisar credenciales.")
-                return None
+# Opciones de socket para las conexiones con los dispositivos: keepalive TCP para que un
+# NAT o firewall intermedio no descarte la conexión inactiva durante la espera entre verificaciones
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60))
+if hasattr(socket, "TCP_KEEPINTVL"):
+    _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 30))
+if hasattr(socket, "TCP_KEEPCNT"):
+    _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3))
+
+# Contexto TLS único compartido por todas las sesiones (los equipos usan certificados autofirmados)
+_SSL_CTX = ssl.create_default_context()
+_SSL_CTX.check_hostname = False
+_SSL_CTX.verify_mode = ssl.CERT_NONE
+
+# Adaptador HTTP que aplica las opciones de keepalive TCP y el contexto TLS compartido a su pool
+class _KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter cuyas conexiones envían keepalives TCP mientras están inactivas
+    y reutilizan el mismo contexto TLS en cada reconexión.
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = _SOCKET_OPTIONS
+        kwargs["ssl_context"] = _SSL_CTX
+        return super().init_poolmanager(*args, **kwargs)
 
-        except Exception as e:
-            logging.error(f"Error en proceso de login: {str(e)}")
+# Función para comprobar si el puerto HTTPS de un dispositivo responde
+def _tcp_up(ip_address, port=443, timeout=TCP_PROBE_TIMEOUT):
+    """
+    Intenta abrir una conexión TCP al dispositivo. Retorna False si no responde,
+    sin esperar los tiempos de espera (y reintentos) del login HTTPS completo.
+    """
+    try:
+        socket.create_connection((ip_address, port), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+# Función para obtener la sesión persistente de un dispositivo
+def _get_session(ip_address, username, password):
+    """
+    Retorna la sesión HTTP persistente del dispositivo. La primera vez crea la
+    sesión con un pool de conexiones reutilizables e inicia sesión; las llamadas
+    siguientes reutilizan la misma sesión (y su conexión TLS).
+    Retorna None si no se pudo iniciar sesión.
+    """
+    session = _SESSIONS.get(ip_address)
+    if session is not None:
+        return session
+
+    # Si el equipo no está accesible, fallar de inmediato en lugar de esperar al login
+    if not _tcp_up(ip_address):
+        logging.error(f"No se pudo conectar con {ip_address}:443")
+        return None
+
+    session = requests.Session()
+    session.verify = False  # Deshabilitar verificación SSL
+    session.headers.update(_HEADERS)
+    session.mount("https://", _KeepAliveAdapter(
+        pool_connections=2,
+        pool_maxsize=4,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=(500, 502, 503, 504),
+            raise_on_status=False
+        )
+    ))
+
+    if not _login(session, ip_address, username, password):
+        session.close()
+        return None
+
+    _SESSIONS[ip_address] = session
+    return session
+
+# Función para detectar si una respuesta corresponde a la página de login
+def _is_login_page(response, check_body=True):
+    """
+    Indica si la respuesta es la página de login (sesión no autenticada o expirada).
+    Con check_body=False solo se revisa la URL final, sin leer el cuerpo de la respuesta.
+    """
+    if 'login.cgi' in response.url or 'login.html' in response.url:
+        return True
+    if not check_body:
+        return False
+    return b'name="username"' in response.content and b'name="password"' in response.content
+
+# Función para realizar un GET autenticado con la sesión persistente
+def _session_get(session, ip_address, username, password, url, **kwargs):
+    """
+    Realiza un GET con la sesión persistente. Si el dispositivo redirige a la
+    página de login (sesión expirada), vuelve a autenticar una vez y repite la petición.
+    """
+    response = session.get(url, **kwargs)
+    if _is_login_page(response, check_body=not kwargs.get('stream')):
+        logging.info("Sesión expirada en %s, autenticando de nuevo...", ip_address)
+        if _login(session, ip_address, username, password):
+            response.close()
+            response = session.get(url, **kwargs)
+    return response
+
+# Función para descargar el cuerpo de un endpoint de estado
+def _fetch_endpoint_body(session, ip_address, username, password, url):
+    """
+    Descarga el cuerpo de un endpoint como bytes. Lee primero un fragmento inicial:
+    si corresponde a la página de login (servida en la misma URL), cierra la conexión
+    sin descargar el resto, vuelve a autenticar y repite la petición una vez. Si el
+    login falla, descarta la sesión para que la próxima consulta cree una nueva.
+    """
+    for attempt in range(2):
+        response = _session_get(session, ip_address, username, password, url, timeout=(CONNECT_TIMEOUT, 15), stream=True)
+        with response:
+            logging.debug("Respuesta de %s: Status %s", url, response.status_code)
+            head = response.raw.read(2048, decode_content=True)
+            if not (b'name="username"' in head and b'name="password"' in head):
+                return head + response.raw.read(decode_content=True)
+
+        if attempt == 0:
+            logging.info("Sesión expirada en %s, autenticando de nuevo...", ip_address)
+            if _login(session, ip_address, username, password):
+                continue
+        if _SESSIONS.get(ip_address) is session:
+            _SESSIONS.pop(ip_address, None)
+        break
+    return head
+
+# Función para extraer datos con las expresiones regulares de respaldo
+def _extract_with_regex(payload):
+    """
+    Busca en el cuerpo (bytes en minúsculas) cada clave con su propio patrón y retorna
+    un diccionario con el primer valor encontrado para cada una. Las búsquedas son
+    independientes: la coincidencia de un campo no puede ocultar la de otro.
+    """
+    found = {}
+    for key, pattern in _PATTERNS.items():
+        match = pattern.search(payload)
+        if match:
+            found[key] = float(match.group(match.lastindex))
+            logging.debug(f"{key} encontrado con regex: {found[key]}")
+    return found
+
+# Función para cancelar las descargas anticipadas que ya no se necesitan
+def _cancel_prefetch(prefetched):
+    """
+    Cancela las descargas de endpoints que todavía no han empezado.
+    """
+    for future in prefetched.values():
+        future.cancel()
+
+# Función para extraer el número inicial de una cadena reportada por el dispositivo
+@lru_cache(maxsize=256)
+def _parse_number(value):
+    """
+    Retorna como float el número al inicio de la cadena (sin la unidad), o None.
+    El resultado se cachea, ya que el equipo reporta los mismos valores en cada consulta.
+    """
+    match = _NUM_RE.match(value)
+    return float(match.group(1)) if match else None
+
+# Función para convertir cualquier valor reportado por el dispositivo a float
+def _fnum(value):
+    """
+    Convierte a float un número o una cadena como "5710 MHz" o "-60".
+    Retorna None si el valor no es numérico.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return _parse_number(value)
+    return None
+
+# Función mejorada para obtener el estado del dispositivo
+def get_device_status(ip_address, username, password, force_refresh=False):
+    """
+    Obtiene el estado del dispositivo usando múltiples métodos de extracción y análisis.
+    Utiliza estrategias progresivas para manejar diferentes tipos de respuestas.
+    Un estado obtenido hace menos de STATUS_CACHE_TTL segundos se reutiliza, y las
+    llamadas simultáneas para el mismo equipo comparten una sola consulta, salvo que
+    se indique force_refresh=True.
+    """
+    if not force_refresh:
+        cached_status = _STATUS_CACHE.get(ip_address)
+        if cached_status and time.monotonic() - cached_status[0] < STATUS_CACHE_TTL:
+            logging.debug("Usando estado en caché de %s", ip_address)
+            return cached_status[1]
+
+        # Si otra consulta del mismo equipo está en curso, compartir su resultado
+        with _STATUS_INFLIGHT_LOCK:
+            pending = _STATUS_INFLIGHT.get(ip_address)
+            owner = pending is None
+            if owner:
+                pending = _STATUS_INFLIGHT[ip_address] = Future()
+        if not owner:
+            logging.debug("Esperando la consulta en curso de %s", ip_address)
+            return pending.result()
+
+        device_status = None
+        try:
+            device_status = _fetch_device_status(ip_address, username, password)
+        finally:
+            with _STATUS_INFLIGHT_LOCK:
+                _STATUS_INFLIGHT.pop(ip_address, None)
+            pending.set_result(device_status)
+        return device_status
+
+    return _fetch_device_status(ip_address, username, password)
+
+# Función para consultar el estado del dispositivo en sus endpoints
+def _fetch_device_status(ip_address, username, password):
+    """
+    Consulta los endpoints de estado del dispositivo (JSON y después HTML/regex) y
+    guarda el resultado en _STATUS_CACHE. Retorna el estado o None si no hubo datos.
+    """
+    try:
+        # PASO 1: Reutilizar la sesión persistente del dispositivo (login solo si es necesario)
+        session = _get_session(ip_address, username, password)
+        if session is None:
             return None
 
-        # PASO 3: Intentar múltiples endpoints para obtener datos
+        # Base URL usando HTTPS
+        base_url = f"https://{ip_address}"
+
+        # PASO 2: Intentar múltiples endpoints para obtener datos
         device_status = {}
 
-        # Lista de endpoints a probar, en orden de prioridad
-        endpoints = [
-            {"url": "/status.cgi", "method": "get", "parser": "json"},
-            {"url": "/iflist.cgi", "method": "get", "parser": "json"},
-            {"url": "/status.cgi", "method": "get", "parser": "html"},
-            {"url": "/iflist.cgi", "method": "get", "parser": "html"},
-            {"url": "/main.cgi", "method": "get", "parser": "html"},
-            {"url": "/link.cgi", "method": "get", "parser": "html"},
-            {"url": "/", "method": "get", "parser": "html"}
-        ]
-
-        for endpoint in endpoints:
+        # Probar primero el endpoint que funcionó la última vez para este dispositivo
+        endpoints = _ENDPOINTS
+        cached_endpoint = _ENDPOINT_CACHE.get(ip_address)
+        if cached_endpoint:
+            endpoints = (cached_endpoint,) + tuple(e for e in _ENDPOINTS if e is not cached_endpoint)
+
+        # Respuestas ya descargadas en esta consulta, para que la fase HTML reutilice
+        # el cuerpo obtenido en la fase JSON en lugar de pedir la misma URL otra vez
+        responses = {}
+
+        # Si el login acaba de devolver /status.cgi, usar ese cuerpo sin otra petición
+        login_status = _LOGIN_STATUS.pop(ip_address, None)
+        if login_status and time.monotonic() - login_status[0] <= _LOGIN_STATUS_MAX_AGE:
+            logging.debug("Reutilizando /status.cgi recibido en el login de %s", ip_address)
+            responses[f"{base_url}/status.cgi"] = login_status[1]
+
+        # Descargas en curso por URL. Sin endpoint conocido, si el primero no sirve se piden
+        # los restantes en paralelo y se siguen evaluando en orden de prioridad
+        prefetched = {}
+
+        for index, endpoint in enumerate(endpoints):
             try:
-                logging.info(f"Intentando obtener datos desde {endpoint['url']} usando {endpoint['parser']}")
+                logging.info("Intentando obtener datos desde %s usando %s", endpoint['url'], endpoint['parser'])
 
-                # Realizar solicitud al endpoint
+                # Realizar solicitud al endpoint (solo si no se descargó antes)
                 request_url = f"{base_url}{endpoint['url']}"
-                if endpoint['method'].lower() == 'get':
-                    response = session.get(request_url, headers=headers, timeout=15)
-                else:
-                    response = session.post(request_url, headers=headers, timeout=15)
-
-                # Guardar respuesta para diagnóstico
-                debug_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                         f"debug_{endpoint['url'].replace('/', '_').replace('.', '_')}_{ip_address.replace('.', '_')}.txt")
-                with open(debug_file, "w", encoding="utf-8") as f:
-                    f.write(response.text)
+                body = responses.get(request_url)
+                if body is None:
+                    # La primera petición es secuencial para que un re-login no se haga en paralelo
+                    if not cached_endpoint and responses and not prefetched:
+                        for pending_endpoint in endpoints[index:]:
+                            pending_url = f"{base_url}{pending_endpoint['url']}"
+                            if (pending_endpoint['method'].lower() == 'get'
+                                    and pending_url not in responses and pending_url not in prefetched):
+                                prefetched[pending_url] = _PREFETCH_POOL.submit(
+                                    _fetch_endpoint_body, session, ip_address, username, password, pending_url
+                                )
+
+                    if request_url in prefetched:
+                        body = prefetched[request_url].result()
+                    elif endpoint['method'].lower() == 'get':
+                        body = _fetch_endpoint_body(session, ip_address, username, password, request_url)
+                    else:
+                        body = session.post(request_url, timeout=(CONNECT_TIMEOUT, 15)).content
+                    responses[request_url] = body
 
-                logging.debug(f"Respuesta de {endpoint['url']}: Status {response.status_code}")
+                    # Guardar respuesta para diagnóstico
+                    _write_debug_file(ip_address, f"{endpoint['url'].translate(_SLUG_TABLE)}.txt", body)
 
                 # Verificar si la respuesta es una página de login
-                if 'name="username"' in response.text and 'name="password"' in response.text:
-                    logging.warning(f"Endpoint {endpoint['url']} redirecciona a login")
+                if b'name="username"' in body and b'name="password"' in body:
+                    logging.warning("Endpoint %s redirecciona a login", endpoint['url'])
+                    _ENDPOINT_CACHE.pop(ip_address, None)
                     continue
 
-                # Parsear respuesta según el tipo
+                # Fase A: parsear como JSON; si aporta métricas se retorna de inmediato
                 if endpoint['parser'] == 'json':
                     try:
-                        data = json.loads(response.text)
-                        logging.info(f"Respuesta JSON válida de {endpoint['url']}")
+                        # Los cuerpos que no empiezan como un objeto JSON se descartan sin parsear
+                        if not body.lstrip().startswith(b'{'):
+                            raise ValueError("la respuesta no es un objeto JSON")
+                        data = _json_loads(body)
+                        logging.info("Respuesta JSON válida de %s", endpoint['url'])
 
                         # Extraer datos según la estructura
-                        if 'wireless' in data:
-                            wireless = data.get('wireless', {})
-                            device_status["signal_level"] = wireless.get('signal')
-                            device_status["ccq"] = wireless.get('ccq')
-                            freq_str = wireless.get('frequency', '')
-                            if freq_str:
-                                # Extraer solo el número de la frecuencia (quitar 'MHz' si existe)
-                                device_status["frequency"] = float(freq_str.split()[0]) if ' ' in freq_str else float(freq_str)
-                            device_status["tx_capacity"] = wireless.get('txrate')
-                            device_status["channel_width"] = wireless.get('chanbw')
-                            device_status["noise_floor"] = wireless.get('noisef')
-                            device_status["distance"] = wireless.get('distance')
-                            device_status["mode"] = wireless.get('mode')
-                            device_status["tx_power"] = wireless.get('txpower')
+                        wireless = data.get('wireless')
+                        if wireless is not None:
+                            for key, source, numeric in _WIRELESS_FIELDS:
+                                value = wireless.get(source)
+                                device_status[key] = _fnum(value) if numeric else value
 
                         # Si hay datos de host
                         if 'host' in data:
@@ -223,144 +750,53 @@ def get_device_status(ip_address, username, password):
                             for interface in data.get('interfaces', []):
                                 if interface.get('ifname') == 'ath0' and 'wireless' in interface:
                                     wireless = interface.get('wireless', {})
-                                    if "signal_level" not in device_status:
-                                        device_status["signal_level"] = wireless.get('signal')
-                                    if "ccq" not in device_status:
-                                        device_status["ccq"] = wireless.get('ccq')
-                                    if "frequency" not in device_status and wireless.get('frequency'):
-                                        freq_str = wireless.get('frequency')
-                                        device_status["frequency"] = float(freq_str.split()[0]) if ' ' in freq_str else float(freq_str)
-
-                        # Convertir valores a tipos correctos
-                        for key in ["signal_level", "ccq", "frequency", "tx_capacity", "channel_width", "noise_floor", "tx_power"]:
-                            if key in device_status and device_status[key] is not None:
-                                try:
-                                    device_status[key] = float(device_status[key])
-                                except (ValueError, TypeError):
-                                    pass
+                                    for key, source in _IFACE_FIELDS:
+                                        if device_status.get(key) is None:
+                                            device_status[key] = _fnum(wireless.get(source))
 
                         # Si hemos encontrado al menos datos básicos, terminamos
                         if "signal_level" in device_status or "ccq" in device_status or "frequency" in device_status:
-                            logging.info(f"Datos obtenidos exitosamente de {endpoint['url']} usando JSON")
+                            logging.info("Datos obtenidos exitosamente de %s usando JSON", endpoint['url'])
+                            _ENDPOINT_CACHE[ip_address] = endpoint
+                            _STATUS_CACHE[ip_address] = (time.monotonic(), device_status)
+                            _cancel_prefetch(prefetched)
                             return device_status
 
-                    except json.JSONDecodeError:
-                        logging.warning(f"Respuesta de {endpoint['url']} no es JSON válido, intentando parseo HTML")
-
-                # Parseo HTML/Regex para dispositivos que no devuelven JSON
-                if endpoint['parser'] == 'html' or (endpoint['parser'] == 'json' and "signal_level" not in device_status):
-                    logging.info(f"Analizando HTML de {endpoint['url']} para extraer datos")
-                    text = response.text
-
-                    # Intentar con BeautifulSoup primero
-                    try:
-                        soup = BeautifulSoup(text, 'html.parser')
-
-                        # Buscar datos en etiquetas span, div o td que contengan los atributos
-                        elements = soup.find_all(['span', 'div', 'td', 'p'])
-
-                        # Buscar atributos en el HTML renderizado
-                        for elem in elements:
-                            elem_text = elem.get_text().lower()
-
-                            if 'signal' in elem_text and not "signal_level" in device_status:
-                                signal_match = re.search(r'(-?\d+\.?\d*)\s*dbm', elem_text)
-                                if signal_match:
-                                    device_status["signal_level"] = float(signal_match.group(1))
-                                    logging.debug(f"Signal encontrado en HTML: {device_status['signal_level']}")
-
-                            if 'ccq' in elem_text and not "ccq" in device_status:
-                                ccq_match = re.search(r'(\d+\.?\d*)%', elem_text)
-                                if ccq_match:
-                                    device_status["ccq"] = float(ccq_match.group(1))
-                                    logging.debug(f"CCQ encontrado en HTML: {device_status['ccq']}")
+                    except ValueError:
+                        logging.warning("Respuesta de %s no es JSON válido", endpoint['url'])
 
-                            if 'freq' in elem_text and not "frequency" in device_status:
-                                freq_match = re.search(r'(\d+\.?\d*)\s*mhz', elem_text)
-                                if freq_match:
-                                    device_status["frequency"] = float(freq_match.group(1))
-                                    logging.debug(f"Frecuencia encontrada en HTML: {device_status['frequency']}")
-
-                    except Exception as e:
-                        logging.warning(f"Error al analizar HTML con BeautifulSoup: {str(e)}")
+                    # Los endpoints JSON nunca pasan por el análisis HTML
+                    continue
 
-                    # Si BeautifulSoup no funcionó, intentar con expresiones regulares
+                # Fase B: parseo HTML/Regex para dispositivos que no devuelven JSON
+                if endpoint['parser'] == 'html':
+                    logging.info("Analizando HTML de %s para extraer datos", endpoint['url'])
+                    # Pasar el HTML a minúsculas una sola vez: los patrones ya están en minúsculas
+                    # y se evalúan sin re.IGNORECASE
+                    body = body.lower()
+
+                    # Buscar señal, CCQ y frecuencia en una sola pasada sobre los bytes del HTML,
+                    # sin decodificar el cuerpo (float() acepta directamente los bytes capturados)
+                    for match in _HTML_FIELDS.finditer(body):
+                        key = match.lastgroup
+                        if key not in device_status:
+                            device_status[key] = float(match.group(match.lastindex + 1))
+                            logging.debug("%s encontrado en HTML: %s", key, device_status[key])
+                            if all(k in device_status for k in ("signal_level", "ccq", "frequency")):
+                                break
+
+                    # Si no se encontraron datos etiquetados, intentar con expresiones regulares
                     if not device_status or not any(key in device_status for key in ["signal_level", "ccq", "frequency"]):
                         logging.info("Intentando extracción con expresiones regulares")
                         try:
                             # Buscar patrones comunes en datos JavaScript o HTML
-                            signal_patterns = [
-                                r'signal["\s:=]+(-?\d+\.?\d*)',
-                                r'signal.*?(-\d+\.?\d*)\s*dBm',
-                                r'Signal.*?(-\d+\.?\d*)',
-                                r'>\s*Signal\s*<.*?>(-\d+\.?\d*)\s*dBm<',
-                                r'sigLevel.*?(-\d+\.?\d*)'
-                            ]
-
-                            for pattern in signal_patterns:
-                                match = re.search(pattern, text, re.IGNORECASE)
-                                if match:
-                                    device_status["signal_level"] = float(match.group(1))
-                                    logging.debug(f"Signal encontrado con regex: {device_status['signal_level']}")
-                                    break
-
-                            ccq_patterns = [
-                                r'ccq["\s:=]+(\d+\.?\d*)',
-                                r'ccq.*?(\d+\.?\d*)%',
-                                r'>\s*CCQ\s*<.*?>(\d+\.?\d*)%<',
-                                r'qualityLevel.*?(\d+\.?\d*)'
-                            ]
-
-                            for pattern in ccq_patterns:
-                                match = re.search(pattern, text, re.IGNORECASE)
-                                if match:
-                                    device_status["ccq"] = float(match.group(1))
-                                    logging.debug(f"CCQ encontrado con regex: {device_status['ccq']}")
-                                    break
-
-                            freq_patterns = [
-                                r'frequency["\s:=]+"?(\d+\.?\d*)(?:\s*MHz)?',
-                                r'>\s*Frequency\s*<.*?>(\d+\.?\d*)\s*MHz<',
-                                r'freq.*?(\d+\.?\d*)\s*MHz',
-                                r'channel.*?(\d+\.?\d*)\s*MHz'
-                            ]
-
-                            for pattern in freq_patterns:
-                                match = re.search(pattern, text, re.IGNORECASE)
-                                if match:
-                                    device_status["frequency"] = float(match.group(1))
-                                    logging.debug(f"Frecuencia encontrada con regex: {device_status['frequency']}")
-                                    break
-
-                            # También buscar otros parámetros importantes
-                            noise_patterns = [
-                                r'noisef["\s:=]+(-?\d+\.?\d*)',
-                                r'noise.*?(-\d+\.?\d*)\s*dBm'
-                            ]
-
-                            for pattern in noise_patterns:
-                                match = re.search(pattern, text, re.IGNORECASE)
-                                if match:
-                                    device_status["noise_floor"] = float(match.group(1))
-                                    break
-
-                            txpower_patterns = [
-                                r'txpower["\s:=]+(\d+\.?\d*)',
-                                r'tx\s*power.*?(\d+\.?\d*)\s*dBm'
-                            ]
-
-                            for pattern in txpower_patterns:
-                                match = re.search(pattern, text, re.IGNORECASE)
-                                if match:
-                                    device_status["tx_power"] = float(match.group(1))
-                                    break
-
+                            device_status.update(_extract_with_regex(body))
                         except Exception as e:
-                            logging.warning(f"Error al extraer datos con regex: {str(e)}")
+                            logging.warning("Error al extraer datos con regex: %s", e)
 
                 # Si hemos encontrado datos básicos, terminamos
                 if "signal_level" in device_status or "ccq" in device_status or "frequency" in device_status:
-                    logging.info(f"Datos extraídos exitosamente de {endpoint['url']}")
+                    logging.info("Datos extraídos exitosamente de %s", endpoint['url'])
 
                     # Imprimir los datos encontrados para diagnóstico
                     log_msg = "Datos encontrados:\n"
@@ -368,256 +804,315 @@ def get_device_status(ip_address, username, password):
                         log_msg += f"  {key}: {value}\n"
                     logging.info(log_msg)
 
+                    _ENDPOINT_CACHE[ip_address] = endpoint
+                    _STATUS_CACHE[ip_address] = (time.monotonic(), device_status)
+                    _cancel_prefetch(prefetched)
                     return device_status
 
             except Exception as e:
-                logging.error(f"Error al procesar endpoint {endpoint['url']}: {str(e)}")
+                logging.error("Error al procesar endpoint %s: %s", endpoint['url'], e)
                 continue
 
         # Si llegamos aquí es que no se pudo obtener datos de ningún endpoint
-        logging.error(f"No se pudo obtener datos de ningún endpoint para {ip_address}")
+        logging.error("No se pudo obtener datos de ningún endpoint para %s", ip_address)
+
+        # Conservar las respuestas recibidas para analizar el fallo (si no se volcaron ya)
+        if not _DEBUG_DUMP:
+            for request_url, body in responses.items():
+                path = request_url[len(base_url):]
+                _write_debug_file(ip_address, f"{path.translate(_SLUG_TABLE)}.txt", body, force=True)
         return None
 
     except Exception as e:
-        logging.error(f"Error general en get_device_status: {str(e)}")
+        logging.error("Error general en get_device_status: %s", e)
         return None
 
-# Función mejorada para cambiar la frecuencia específicamente optimizada para PowerBeam M5
-def change_frequency(ip_address, username, password, new_frequency):
+# Función para leer solo la frecuencia actual desde el JSON de status.cgi
+def _get_frequency_fast(ip_address, username, password):
     """
-    Cambia la frecuencia del dispositivo PowerBeam M5 utilizando métodos HTTP robustos.
-    Implementa una solución específica para los dispositivos Ubiquiti PowerBeam M5.
+    Obtiene la frecuencia actual leyendo únicamente wireless.frequency de /status.cgi.
+    Retorna None si el dispositivo no responde con JSON (se sabe que usa HTML) o si el
+    dato no está disponible, para que el llamador use get_device_status.
     """
-    try:
-        # Deshabilitar advertencias SSL
-        requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
+    cached_endpoint = _ENDPOINT_CACHE.get(ip_address)
+    if cached_endpoint and cached_endpoint['parser'] != 'json':
+        return None
 
-        # Crear una sesión nueva
-        session = requests.Session()
-        session.verify = False
+    session = _get_session(ip_address, username, password)
+    if session is None:
+        return None
 
-        # URL base
-        base_url = f"https://{ip_address}"
+    try:
+        response = _session_get(session, ip_address, username, password,
+                                f"https://{ip_address}/status.cgi", timeout=(CONNECT_TIMEOUT, 10))
+        if not response.content.lstrip().startswith(b'{'):
+            return None
+        wireless = _json_loads(response.content).get('wireless') or {}
+        return _fnum(wireless.get('frequency'))
+    except (requests.exceptions.RequestException, ValueError, AttributeError, TypeError) as e:
+        logging.debug("Lectura rápida de frecuencia no disponible para %s: %s", ip_address, e)
+        return None
 
-        # Establecer encabezados que imitan un navegador
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache"
-        }
+# Función para esperar a que el dispositivo reporte la frecuencia solicitada
+def _wait_for_frequency(ip_address, username, password, new_frequency, timeout=VERIFY_TIMEOUT):
+    """
+    Consulta el estado del dispositivo con backoff exponencial (2s, 4s, 8s... hasta 20s,
+    con variación aleatoria) hasta que la frecuencia coincide o se agota el tiempo.
+    Retorna True si se confirma el cambio, False si la última lectura muestra otra
+    frecuencia y True (asumiendo éxito) si no se pudo leer la frecuencia.
+    Cada intento comprueba antes con una conexión TCP (acotada al tiempo restante) que el
+    equipo responde: si no, se omiten las consultas HTTP y sus reintentos, de modo que el
+    tiempo total no supera timeout.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 2.0
+    frequency_mismatch = False
 
-        # PASO 1: Realizar una petición inicial para obtener cookies de sesión
-        logging.info(f"Iniciando proceso de cambio de frecuencia para {ip_address} a {new_frequency} MHz")
+    # Recién aplicado el cambio el equipo aún reporta la frecuencia anterior:
+    # la primera lectura se hace tras la espera inicial
+    time.sleep(min(delay, timeout))
+    delay *= 2
+
+    while True:
         try:
-            initial_response = session.get(f"{base_url}/", headers=headers, timeout=10)
-            logging.debug(f"Respuesta inicial: {initial_response.status_code}")
+            remaining = deadline - time.monotonic()
+            current_freq = None
+            if not _tcp_up(ip_address, timeout=max(0.1, min(TCP_PROBE_TIMEOUT, remaining))):
+                logging.warning("%s no responde, se omite la lectura de frecuencia", ip_address)
+            else:
+                # Lectura rápida (solo la frecuencia desde el JSON); si no es posible, estado completo
+                current_freq = _get_frequency_fast(ip_address, username, password)
+                if current_freq is None:
+                    current_status = get_device_status(ip_address, username, password, force_refresh=True)
+                    if current_status:
+                        current_freq = current_status.get("frequency")
+
+            if current_freq is not None:
+
+                # Permitir una pequeña diferencia debido a redondeo
+                if abs(float(current_freq) - float(new_frequency)) < 2:
+                    logging.info("✅ Cambio de frecuencia confirmado: %s MHz", current_freq)
+                    return True
+
+                logging.warning("❌ Frecuencia actual (%s) no coincide con la solicitada (%s)", current_freq, new_frequency)
+                frequency_mismatch = True
+            else:
+                logging.warning("No se pudo obtener la frecuencia actual")
+                frequency_mismatch = False
         except Exception as e:
-            logging.warning(f"Error en petición inicial (no crítico): {str(e)}")
-            # Continuamos aunque falle la petición inicial
-
-        # PASO 2: Realizar login - Esta es la parte crucial
-        login_url = f"{base_url}/login.cgi"
+            logging.warning("Error al verificar frecuencia: %s", e)
+            frequency_mismatch = False
 
-        # En PowerBeam M5, el login redirige a status.cgi por defecto
-        login_data = {
-            "username": username,
-            "password": password,
-            "uri": "/status.cgi"
-        }
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
 
-        # Configurar encabezados específicos para el formulario de login
-        login_headers = headers.copy()
-        login_headers["Content-Type"] = "application/x-www-form-urlencoded"
-        login_headers["Referer"] = f"{base_url}/"
+        wait = min(delay + random.uniform(0, delay * 0.5), remaining)
+        logging.info("Esperando %.1f segundos e intentando verificar de nuevo...", wait)
+        time.sleep(wait)
+        delay = min(delay * 2, 20)
 
-        # Intentar login y manejar posibles redirecciones
-        try:
-            login_response = session.post(
-                login_url,
-                data=login_data,
-                headers=login_headers,
-                timeout=15,
-                allow_redirects=True
-            )
+    if frequency_mismatch:
+        logging.warning("No se pudo verificar el cambio de frecuencia antes del tiempo límite")
+        return False
 
-            logging.debug(f"Login: status={login_response.status_code}, url={login_response.url}")
+    # Si el equipo nunca devolvió la frecuencia (p. ej. sigue reiniciando), asumir éxito
+    logging.info("Asumiendo que el cambio de frecuencia fue exitoso")
+    return True
 
-            # Verificar si el login fue exitoso
-            if 'login.cgi' in login_response.url or 'login' in login_response.url:
-                logging.error(f"Login fallido para {ip_address}. Verificar credenciales.")
-                return False
-
-            # Guardar respuesta para depuración
-            debug_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                    f"debug_login_response_{ip_address.replace('.', '_')}.html")
-            with open(debug_file, "w", encoding="utf-8") as f:
-                f.write(login_response.text)
-
-            logging.info(f"Login exitoso para {ip_address}")
+# Función para localizar el formulario de cambio de frecuencia de un dispositivo
+def _discover_frequency_form(session, ip_address, username, password):
+    """
+    Busca la página de configuración wireless y analiza su formulario de frecuencia.
+    Retorna un diccionario con la URL de envío, los campos de frecuencia, el resto
+    de datos del formulario (token, botones y campos ocultos) y el token CSRF,
+    o None si no se encontró la página.
+    """
+    # URL base
+    base_url = f"https://{ip_address}"
 
-        except Exception as e:
-            logging.error(f"Error en proceso de login: {str(e)}")
-            return False
+    # PASO 2: Acceder específicamente a la página de configuración wireless
+    # En PowerBeam M5, la configuración de frecuencia está en varios lugares posibles
+    wireless_page_url = None
+    wireless_page_response = None
 
-        # PASO 3: Acceder específicamente a la página de configuración wireless
-        # En PowerBeam M5, la configuración de frecuencia está en varios lugares posibles
+    for url in _WIRELESS_URLS:
+        try:
+            config_url = f"{base_url}{url}"
+            logging.info(f"Intentando acceder a {config_url}")
 
-        # Lista de URLs a intentar, en orden de prioridad para PowerBeam M5
-        wireless_config_urls = [
-            "/link.cgi",           # Principal para configuración de enlace
-            "/spectral.cgi",       # Análisis espectral y frecuencia
-            "/main.cgi?id=9",      # Página wireless en algunos modelos
-            "/main.cgi",           # Página principal de configuración
-            "/wireless.cgi",       # Configuración wireless alternativa
-            "/advanced.cgi"        # Configuración avanzada
-        ]
+            config_response = _session_get(
+                session, ip_address, username, password,
+                config_url,
+                timeout=(CONNECT_TIMEOUT, 15),
+                allow_redirects=True
+            )
 
-        wireless_page_url = None
-        wireless_page_response = None
+            # Verificar si la página contiene campos de frecuencia
+            config_body = config_response.content.lower()
+            if b'freq' in config_body or b'chan' in config_body:
 
-        for url in wireless_config_urls:
-            try:
-                config_url = f"{base_url}{url}"
-                logging.info(f"Intentando acceder a {config_url}")
+                logging.info(f"Página de configuración encontrada en {url}")
+                wireless_page_url = config_url
+                wireless_page_response = config_response
 
-                config_response = session.get(
-                    config_url,
-                    headers=headers,
-                    timeout=15,
-                    allow_redirects=True
-                )
+                # Guardar respuesta para depuración
+                _write_debug_file(ip_address, f"config_{url.replace('/', '_')}.html", config_response.content)
 
-                # Verificar si la página contiene campos de frecuencia
-                if ('freq' in config_response.text.lower() or
-                    'channel' in config_response.text.lower() or
-                    'chan' in config_response.text.lower()):
+                break
 
-                    logging.info(f"Página de configuración encontrada en {url}")
-                    wireless_page_url = config_url
-                    wireless_page_response = config_response
+        except requests.exceptions.RequestException as e:
+            logging.warning(f"Error al acceder a {url}: {str(e)}")
+            continue
 
-                    # Guardar respuesta para depuración
-                    debug_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                            f"debug_config_{url.replace('/', '_')}_{ip_address.replace('.', '_')}.html")
-                    with open(debug_file, "w", encoding="utf-8") as f:
-                        f.write(config_response.text)
+    if not wireless_page_url or not wireless_page_response:
+        logging.error("No se pudo encontrar la página de configuración de frecuencia")
+        return None
 
-                    break
+    # PASO 3: Analizar la página para encontrar el formulario correcto y sus campos
+    tree = lxml_html.fromstring(wireless_page_response.content)
+
+    # Extraer el token CSRF si existe
+    csrf_token = None
+    csrf_match = _CSRF_RE.search(wireless_page_response.content)
+    if csrf_match:
+        csrf_token = csrf_match.group(1).decode('utf-8', errors='replace')
+        logging.info(f"Token CSRF encontrado: {csrf_token}")
+
+    # Identificar en una sola pasada los campos relacionados con frecuencia/canal,
+    # agrupados por el formulario que los contiene (en orden de documento)
+    frequency_form = None
+    frequency_fields = []
+    form_groups = []
+
+    for field in _FREQ_FIELDS_XPATH(tree):
+        form = next(field.iterancestors('form'))
+        if form_groups and form_groups[-1][0] is form:
+            form_groups[-1][1].append(field.get('name'))
+        else:
+            form_groups.append((form, [field.get('name')]))
+
+    for form, freq_related_inputs in form_groups:
+        # Si este formulario tiene campos relacionados con frecuencia
+        if freq_related_inputs:
+            frequency_form = form
+            frequency_fields.extend(freq_related_inputs)
+            logging.info(f"Formulario de frecuencia encontrado con campos: {freq_related_inputs}")
+
+            # Si el formulario tiene un atributo action, lo usamos
+            if form.get('action'):
+                form_action = form.get('action')
+                # Si la acción no comienza con http o /, asumir que es relativa
+                if not form_action.startswith('http') and not form_action.startswith('/'):
+                    form_action = f"/{form_action}"
+                # Si la acción es relativa, construir URL completa
+                if not form_action.startswith('http'):
+                    form_action = f"{base_url}{form_action}"
+                wireless_page_url = form_action
+                logging.info(f"URL de acción del formulario: {wireless_page_url}")
+
+    # Si no encontramos campos específicos, usar nombres comunes para PowerBeam M5
+    if not frequency_fields:
+        frequency_fields = _FREQ_FIELDS_DEFAULT
+        logging.info(f"Usando campos de frecuencia predeterminados: {frequency_fields}")
+
+    # PASO 4: Reunir los datos del formulario; los campos de frecuencia se completan en cada cambio
+    form_data = dict.fromkeys(frequency_fields)
+
+    # Añadir token CSRF si existe
+    if csrf_token:
+        form_data['token'] = csrf_token
+
+    # Identificar botones de submit en el formulario
+    submit_buttons = []
+    if frequency_form is not None:
+        # Buscar inputs de tipo submit
+        submits = frequency_form.xpath(".//input[@type='submit']")
+        for submit in submits:
+            if submit.get('name'):
+                submit_buttons.append((submit.get('name'), submit.get('value', '')))
+
+    # Si encontramos botones de submit, añadirlos a los datos del formulario
+    if submit_buttons:
+        for name, value in submit_buttons:
+            form_data[name] = value
+            logging.info(f"Usando botón submit: {name}={value}")
+    else:
+        # Si no hay botones específicos, añadir valores genéricos conocidos para PowerBeam
+        form_data['change'] = 'Apply'
+        logging.info("Usando valor de submit genérico: change=Apply")
+
+    # También podemos intentar extraer campos ocultos que puedan ser necesarios
+    if frequency_form is not None:
+        hidden_fields = frequency_form.xpath(".//input[@type='hidden']")
+        for field in hidden_fields:
+            if field.get('name') and field.get('name') not in form_data and field.get('value') is not None:
+                form_data[field.get('name')] = field.get('value')
+                logging.debug(f"Campo oculto añadido: {field.get('name')}={field.get('value')}")
+
+    for field in frequency_fields:
+        form_data.pop(field, None)
+
+    return {
+        "url": wireless_page_url,
+        "fields": tuple(frequency_fields),
+        "data": form_data,
+        "csrf_token": csrf_token,
+    }
+
+# Función para buscar un formulario de confirmación en la respuesta al cambio
+def _find_confirm_form(body):
+    """
+    Retorna el primer <form> cuya acción es de confirmación (confirm/apply/commit), o None.
+    Las respuestas sin elementos HTML (vacías, solo un comentario o una declaración XML)
+    no tienen formulario: lxml las rechaza con ParserError y se tratan igual.
+    """
+    try:
+        tree = lxml_html.fromstring(body)
+    except etree.ParserError:
+        return None
+    for form in tree.iter('form'):
+        if _CONFIRM_ACTION_RE.search(form.get('action', '')):
+            return form
+    return None
 
-            except Exception as e:
-                logging.warning(f"Error al acceder a {url}: {str(e)}")
-                continue
+# Función mejorada para cambiar la frecuencia específicamente optimizada para PowerBeam M5
+def change_frequency(ip_address, username, password, new_frequency):
+    """
+    Cambia la frecuencia del dispositivo PowerBeam M5 utilizando métodos HTTP robustos.
+    Implementa una solución específica para los dispositivos Ubiquiti PowerBeam M5.
+    """
+    try:
+        # El estado en caché deja de ser válido en cuanto se cambia la frecuencia
+        _STATUS_CACHE.pop(ip_address, None)
 
-        if not wireless_page_url or not wireless_page_response:
-            logging.error("No se pudo encontrar la página de configuración de frecuencia")
+        # PASO 1: Reutilizar la sesión persistente del dispositivo (login solo si es necesario)
+        logging.info(f"Iniciando proceso de cambio de frecuencia para {ip_address} a {new_frequency} MHz")
+        session = _get_session(ip_address, username, password)
+        if session is None:
             return False
 
-        # PASO 4: Analizar la página para encontrar el formulario correcto y sus campos
-        soup = BeautifulSoup(wireless_page_response.text, 'html.parser')
+        # PASO 2-4: Reutilizar el formulario analizado en un cambio anterior; si no
+        # está en caché, localizar la página de configuración y analizarlo
+        form = _FORM_CACHE.get(ip_address)
+        from_cache = form is not None
+        if form is None:
+            form = _discover_frequency_form(session, ip_address, username, password)
+            if form is None:
+                return False
+            _FORM_CACHE[ip_address] = form
+        else:
+            logging.info(f"Usando formulario de frecuencia en caché: {form['url']}")
 
-        # Extraer el token CSRF si existe
-        csrf_token = None
-        token_inputs = soup.find_all('input', {'name': ['token', 'csrf_token', 'csrf', '_csrf']})
-        for token_input in token_inputs:
-            if 'value' in token_input.attrs:
-                csrf_token = token_input['value']
-                logging.info(f"Token CSRF encontrado: {csrf_token}")
-                break
+        base_url = f"https://{ip_address}"
+        wireless_page_url = form["url"]
+        csrf_token = form["csrf_token"]
+        form_data = dict.fromkeys(form["fields"], str(new_frequency))
+        for name, value in form["data"].items():
+            form_data.setdefault(name, value)
 
-        # Identificar todos los formularios y sus campos relacionados con frecuencia
-        forms = soup.find_all('form')
-        frequency_form = None
-        frequency_fields = []
-
-        for form in forms:
-            # Buscar campos de input que tengan que ver con frecuencia/canal
-            inputs = form.find_all('input')
-            select_fields = form.find_all('select')
-
-            freq_related_inputs = []
-
-            # Revisar inputs
-            for input_field in inputs:
-                if input_field.get('name') and any(keyword in input_field.get('name', '').lower()
-                                               for keyword in ['freq', 'channel', 'chan']):
-                    freq_related_inputs.append(input_field.get('name'))
-
-            # Revisar selects (combobox)
-            for select_field in select_fields:
-                if select_field.get('name') and any(keyword in select_field.get('name', '').lower()
-                                                for keyword in ['freq', 'channel', 'chan']):
-                    freq_related_inputs.append(select_field.get('name'))
-
-            # Si este formulario tiene campos relacionados con frecuencia
-            if freq_related_inputs:
-                frequency_form = form
-                frequency_fields.extend(freq_related_inputs)
-                logging.info(f"Formulario de frecuencia encontrado con campos: {freq_related_inputs}")
-
-                # Si el formulario tiene un atributo action, lo usamos
-                if form.get('action'):
-                    form_action = form.get('action')
-                    # Si la acción no comienza con http o /, asumir que es relativa
-                    if not form_action.startswith('http') and not form_action.startswith('/'):
-                        form_action = f"/{form_action}"
-                    # Si la acción es relativa, construir URL completa
-                    if not form_action.startswith('http'):
-                        form_action = f"{base_url}{form_action}"
-                    wireless_page_url = form_action
-                    logging.info(f"URL de acción del formulario: {wireless_page_url}")
-
-        # Si no encontramos campos específicos, usar nombres comunes para PowerBeam M5
-        if not frequency_fields:
-            frequency_fields = [
-                'freq', 'frequency', 'chan_freq', 'channel',
-                'chan', 'channelwidth', 'channel_width', 'chanbw'
-            ]
-            logging.info(f"Usando campos de frecuencia predeterminados: {frequency_fields}")
-
-        # PASO 5: Construir los datos del formulario para cambiar la frecuencia
-        form_data = {}
-
-        # Añadir campos de frecuencia
-        for field in frequency_fields:
-            form_data[field] = str(new_frequency)
-
-        # Añadir token CSRF si existe
-        if csrf_token:
-            form_data['token'] = csrf_token
-
-        # Identificar botones de submit en el formulario
-        submit_buttons = []
-        if frequency_form:
-            # Buscar inputs de tipo submit
-            submits = frequency_form.find_all('input', {'type': 'submit'})
-            for submit in submits:
-                if submit.get('name'):
-                    submit_buttons.append((submit.get('name'), submit.get('value', '')))
-
-        # Si encontramos botones de submit, añadirlos a los datos del formulario
-        if submit_buttons:
-            for name, value in submit_buttons:
-                form_data[name] = value
-                logging.info(f"Usando botón submit: {name}={value}")
-        else:
-            # Si no hay botones específicos, añadir valores genéricos conocidos para PowerBeam
-            form_data['change'] = 'Apply'
-            logging.info("Usando valor de submit genérico: change=Apply")
-
-        # También podemos intentar extraer campos ocultos que puedan ser necesarios
-        if frequency_form:
-            hidden_fields = frequency_form.find_all('input', {'type': 'hidden'})
-            for field in hidden_fields:
-                if field.get('name') and field.get('name') not in form_data and field.get('value') is not None:
-                    form_data[field.get('name')] = field.get('value')
-                    logging.debug(f"Campo oculto añadido: {field.get('name')}={field.get('value')}")
-
-        # PASO 6: Enviar la solicitud para cambiar la frecuencia
-        form_headers = headers.copy()
-        form_headers["Content-Type"] = "application/x-www-form-urlencoded"
-        form_headers["Referer"] = wireless_page_url
+        # PASO 5: Enviar la solicitud para cambiar la frecuencia
+        form_headers = {**_FORM_HEADERS, "Referer": wireless_page_url}
 
         logging.info(f"Enviando solicitud de cambio de frecuencia a {wireless_page_url}")
         logging.info(f"Datos del formulario: {form_data}")
@@ -627,24 +1122,39 @@ def change_frequency(ip_address, username, password, new_frequency):
                 wireless_page_url,
                 data=form_data,
                 headers=form_headers,
-                timeout=20,
+                timeout=(CONNECT_TIMEOUT, 20),
                 allow_redirects=True
             )
 
+            # Si el equipo rechaza el formulario en caché (token vencido, sesión expirada o
+            # página movida tras actualizar el firmware), autenticar de nuevo, volver a
+            # analizar la página y reenviar
+            if from_cache and (400 <= change_response.status_code < 500 or _is_login_page(change_response)):
+                logging.info(f"Formulario en caché rechazado por {ip_address}, analizando la página de nuevo...")
+                _FORM_CACHE.pop(ip_address, None)
+                if not _login(session, ip_address, username, password):
+                    return False
+                return change_frequency(ip_address, username, password, new_frequency)
+
             logging.debug(f"Respuesta al cambio: status={change_response.status_code}, url={change_response.url}")
 
             # Guardar respuesta para depuración
-            debug_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                    f"debug_change_response_{ip_address.replace('.', '_')}.html")
-            with open(debug_file, "w", encoding="utf-8") as f:
-                f.write(change_response.text)
+            _write_debug_file(ip_address, "change_response.html", change_response.content)
+
+            # Si el equipo rechazó el cambio, no tiene sentido confirmar, reiniciar
+            # la interfaz ni esperar la verificación: fallar de inmediato
+            if change_response.status_code >= 400 or _is_login_page(change_response):
+                logging.error(f"El equipo {ip_address} rechazó el cambio de frecuencia "
+                              f"(status={change_response.status_code}, url={change_response.url})")
+                _FORM_CACHE.pop(ip_address, None)
+                return False
 
-            # PASO 7: PowerBeam M5 a veces requiere una confirmación adicional
-            # Buscar formularios de confirmación en la respuesta
-            confirm_soup = BeautifulSoup(change_response.text, 'html.parser')
-            confirm_form = confirm_soup.find('form', {'action': re.compile(r'confirm|apply|commit')})
+            # PASO 6: PowerBeam M5 a veces requiere una confirmación adicional
+            # Buscar formularios de confirmación en la respuesta (con lxml, como en _discover_frequency_form)
+            change_body = change_response.content
+            confirm_form = _find_confirm_form(change_body)
 
-            if confirm_form:
+            if confirm_form is not None:
                 logging.info("Detectado formulario de confirmación, enviando confirmación...")
 
                 confirm_url = confirm_form.get('action')
@@ -661,7 +1171,7 @@ def change_frequency(ip_address, username, password, new_frequency):
                 confirm_data = {}
 
                 # Extraer campos del formulario
-                for input_field in confirm_form.find_all('input'):
+                for input_field in confirm_form.iter('input'):
                     if input_field.get('name'):
                         confirm_data[input_field.get('name')] = input_field.get('value', '')
 
@@ -677,23 +1187,22 @@ def change_frequency(ip_address, username, password, new_frequency):
                     confirm_url,
                     data=confirm_data,
                     headers=form_headers,
-                    timeout=20,
+                    timeout=(CONNECT_TIMEOUT, 20),
                     allow_redirects=True
                 )
 
                 logging.debug(f"Respuesta a confirmación: status={confirm_response.status_code}")
 
                 # Guardar respuesta para depuración
-                debug_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
-                                        f"debug_confirm_response_{ip_address.replace('.', '_')}.html")
-                with open(debug_file, "w", encoding="utf-8") as f:
-                    f.write(confirm_response.text)
+                _write_debug_file(ip_address, "confirm_response.html", confirm_response.content)
 
-            # PASO 8: Algunos dispositivos pueden requerir un reinicio de la interfaz
-            # Buscamos si hay indicaciones de reinicio en la respuesta
-            restart_text = change_response.text.lower()
+                if confirm_response.status_code >= 400:
+                    logging.error(f"El equipo {ip_address} rechazó la confirmación (status={confirm_response.status_code})")
+                    return False
 
-            if 'restart' in restart_text or 'reboot' in restart_text or 'reinicio' in restart_text:
+            # PASO 7: Algunos dispositivos pueden requerir un reinicio de la interfaz
+            # Buscamos si hay indicaciones de reinicio en la respuesta (sobre los bytes, sin copiarla)
+            if _RESTART_RE.search(change_body):
                 logging.info("Se detecta posible necesidad de reinicio. Enviando comando de reinicio de interfaz...")
 
                 # Intentar reiniciar la interfaz wireless
@@ -709,67 +1218,21 @@ def change_frequency(ip_address, username, password, new_frequency):
                         restart_url,
                         data=restart_data,
                         headers=form_headers,
-                        timeout=20,
+                        timeout=(CONNECT_TIMEOUT, 20),
                         allow_redirects=True
                     )
                     logging.debug(f"Respuesta a reinicio: status={restart_response.status_code}")
-                except Exception as e:
+                except requests.exceptions.RequestException as e:
                     logging.warning(f"Error al intentar reiniciar la interfaz (no crítico): {str(e)}")
 
-            # PASO 9: Esperar a que los cambios se apliquen
-            logging.info("Esperando 30 segundos para que se apliquen los cambios...")
-            time.sleep(30)
-
-            # PASO 10: Verificar si el cambio se aplicó correctamente
+            # PASO 8: Verificar el cambio consultando el equipo con esperas crecientes,
+            # terminando en cuanto el equipo reporta la nueva frecuencia
             logging.info("Verificando si el cambio de frecuencia se aplicó correctamente...")
-
-            # Esperar un poco más si los dispositivos están reiniciando
-            for attempt in range(3):
-                try:
-                    current_status = get_device_status(ip_address, username, password)
-
-                    if current_status and "frequency" in current_status:
-                        current_freq = current_status["frequency"]
-
-                        # Verificar si la frecuencia cambió
-                        # Permitir una pequeña diferencia debido a redondeo
-                        if abs(float(current_freq) - float(new_frequency)) < 2:
-                            logging.info(f"✅ Cambio de frecuencia confirmado: {current_freq} MHz")
-                            return True
-                        else:
-                            logging.warning(f"❌ Frecuencia actual ({current_freq}) no coincide con la solicitada ({new_frequency})")
-
-                            # Si es el último intento, retornar False
-                            if attempt == 2:
-                                return False
-                            else:
-                                logging.info(f"Esperando 15 segundos más e intentando verificar de nuevo...")
-                                time.sleep(15)
-                    else:
-                        logging.warning("No se pudo obtener la frecuencia actual")
-
-                        # Si es el último intento, asumir éxito
-                        if attempt == 2:
-                            logging.info("Asumiendo que el cambio de frecuencia fue exitoso")
-                            return True
-                        else:
-                            logging.info(f"Esperando 15 segundos más e intentando verificar de nuevo...")
-                            time.sleep(15)
-
-                except Exception as e:
-                    logging.warning(f"Error al verificar frecuencia en intento {attempt+1}: {str(e)}")
-
-                    # Si es el último intento, asumir éxito
-                    if attempt == 2:
-                        logging.info("Asumiendo que el cambio de frecuencia fue exitoso a pesar del error")
-                        return True
-                    else:
-                        logging.info(f"Esperando 15 segundos más e intentando verificar de nuevo...")
-                        time.sleep(15)
-
-            # Si llegamos aquí, significa que no pudimos verificar el cambio
-            logging.warning("No se pudo verificar el cambio de frecuencia después de múltiples intentos")
-            return False
+            if not _wait_for_frequency(ip_address, username, password, new_frequency):
+                # El formulario pudo quedar desactualizado (p. ej. tras actualizar el firmware)
+                _FORM_CACHE.pop(ip_address, None)
+                return False
+            return True
 
         except Exception as e:
             logging.error(f"Error al enviar solicitud de cambio de frecuencia: {str(e)}")
@@ -779,6 +1242,25 @@ def change_frequency(ip_address, username, password, new_frequency):
         logging.error(f"Error general en change_frequency: {str(e)}")
         return False
 
+# Función para dejar listo el cambio de frecuencia de un dispositivo
+def _prepare_frequency_change(ip_address, username, password):
+    """
+    Inicia sesión y analiza el formulario de frecuencia del dispositivo si aún no está
+    en caché, para que el cambio posterior se reduzca a un único POST. Se ejecuta en
+    segundo plano mientras se cambia el otro dispositivo del enlace.
+    """
+    if ip_address in _FORM_CACHE:
+        return
+    try:
+        session = _get_session(ip_address, username, password)
+        if session is None:
+            return
+        form = _discover_frequency_form(session, ip_address, username, password)
+        if form is not None:
+            _FORM_CACHE[ip_address] = form
+    except Exception as e:
+        logging.warning(f"No se pudo preparar el cambio de frecuencia en {ip_address}: {str(e)}")
+
 # Función para obtener y mostrar información detallada del enlace
 def display_link_info(ip_address, username, password):
     """
@@ -827,94 +1309,369 @@ Tiempo activo: {device_data.get('uptime', 'Desconocido')}
         print(error_msg)
         return None
 
+# Función para obtener el site survey del dispositivo en una sola petición
+def _site_survey(ip_address, username, password):
+    """
+    Obtiene de /survey.json.cgi la lista de redes detectadas por el radio, con su
+    frecuencia y señal. Retorna una lista de tuplas (frecuencia_mhz, señal_dbm) o
+    None si el firmware no expone el survey o la respuesta no es válida.
+    """
+    session = _get_session(ip_address, username, password)
+    if session is None:
+        return None
+
+    try:
+        response = _session_get(session, ip_address, username, password,
+                                f"https://{ip_address}/survey.json.cgi?iface=ath0", timeout=(CONNECT_TIMEOUT, 30))
+        if response.status_code != 200:
+            return None
+        entries = _json_loads(response.content)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.warning(f"Error al obtener el site survey de {ip_address}: {str(e)}")
+        return None
+
+    survey = []
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        freq = _fnum(entry.get('freq', entry.get('frequency')))
+        signal = _fnum(entry.get('signal', entry.get('signal_level')))
+        if freq is None or signal is None:
+            continue
+        # Algunos firmwares reportan la frecuencia en GHz
+        if freq < 100:
+            freq *= 1000
+        survey.append((freq, signal))
+    return survey
+
+# Función para puntuar la interferencia de una frecuencia según el site survey
+def _survey_interference(survey, frequency):
+    """
+    Retorna la señal más fuerte (dBm) de las redes detectadas a menos de
+    SURVEY_CHANNEL_SPACING MHz de la frecuencia; -100 si el canal está libre.
+    """
+    signals = [signal for freq, signal in survey if abs(freq - frequency) < SURVEY_CHANNEL_SPACING]
+    return max(signals) if signals else -100.0
+
 # Función para encontrar la mejor frecuencia disponible
-def find_best_frequency(ip_address, username, password, current_frequency):
+def find_best_frequency(ip_address, username, password, current_frequency, survey_future=None):
     """
     Encuentra la mejor frecuencia disponible
     Si no puede escanear, selecciona una frecuencia aleatoria diferente a la actual
+    Si se pasa survey_future (un site survey ya lanzado en segundo plano), usa su resultado
+    en lugar de escanear de nuevo
     """
+    candidates = _NEIGHBORS.get(current_frequency) or AVAILABLE_FREQUENCIES
+
+    # Si está habilitado, elegir la frecuencia menos ocupada según un único site survey
+    if USE_SITE_SURVEY:
+        if survey_future is not None:
+            survey = survey_future.result()
+        else:
+            survey = _site_survey(ip_address, username, password)
+        if survey:
+            scores = {freq: _survey_interference(survey, freq) for freq in candidates}
+            best_score = min(scores.values())
+            best = [freq for freq, score in scores.items() if score == best_score]
+            logging.info(f"Site survey: interferencia por frecuencia {scores}")
+            return random.choice(best)
+        logging.warning("Site survey no disponible, se elige una frecuencia aleatoria")
+
     # Por defecto, elegir una frecuencia aleatoria diferente a la actual
-    available_options = [f for f in AVAILABLE_FREQUENCIES if f != current_frequency]
-    if not available_options:
-        return AVAILABLE_FREQUENCIES[0]  # Si solo hay una frecuencia, usar esa
+    # (si la actual no es conocida o es la única configurada, elegir entre todas)
+    return random.choice(candidates)
+
+# Márgenes de calidad de las últimas verificaciones, para detectar tendencias del enlace
+_MARGIN_HISTORY = deque(maxlen=20)
+
+# Función para calcular el intervalo hasta la próxima verificación
+def _next_check_interval(status, previous_interval):
+    """
+    Calcula el intervalo adaptativo hasta la próxima verificación según el margen
+    de la señal y el CCQ respecto a sus umbrales. Cerca del umbral se usa el
+    intervalo mínimo; con el enlace estable el intervalo crece de forma progresiva
+    hasta un máximo proporcional al margen disponible. Si el margen cae claramente
+    por debajo de su media reciente (el enlace se degrada), el intervalo se reduce
+    a la mitad en cada verificación.
+    """
+    margins = []
+    if status:
+        if status.get('signal_level') is not None:
+            margins.append((status['signal_level'] - SIGNAL_THRESHOLD) / 10)
+        if status.get('ccq') is not None:
+            margins.append((status['ccq'] - CCQ_THRESHOLD) / 20)
+
+    # Sin datos de calidad se mantiene el intervalo configurado
+    if not margins:
+        return CHECK_INTERVAL
+
+    margin = min(margins)
+    _MARGIN_HISTORY.append(margin)
+    if margin < 0.5:
+        return MIN_CHECK_INTERVAL
+
+    # Tendencia a la baja respecto a las últimas muestras: acortar de forma geométrica
+    baseline = sum(_MARGIN_HISTORY) / len(_MARGIN_HISTORY)
+    if margin < 0.5 * baseline:
+        return max(MIN_CHECK_INTERVAL, previous_interval / 2)
+
+    target = min(MAX_CHECK_INTERVAL, CHECK_INTERVAL * (1 + margin))
+    return max(MIN_CHECK_INTERVAL, min(target, previous_interval * 1.5))
+
+# Verificación inmediata solicitada con SIGUSR1. El manejador solo cambia este indicador:
+# Python lo ejecuta en el hilo principal, que es el mismo que espera, así que tomar un
+# lock (p. ej. el de threading.Event) desde el manejador podría bloquear el servicio
+_CHECK_REQUESTED = False
+_WAKE_SLICE = 1  # segundos entre revisiones del indicador durante la espera
+
+# Manejador de SIGUSR1: solicita una verificación inmediata
+def _request_check(signum, frame):
+    """
+    Marca que se pidió una verificación para que el ciclo de monitoreo no espere el intervalo.
+    """
+    global _CHECK_REQUESTED
+    _CHECK_REQUESTED = True
 
-    return random.choice(available_options)
+# Función para esperar hasta la próxima verificación
+def _sleep_until_next_check(seconds):
+    """
+    Espera el intervalo indicado en tramos de _WAKE_SLICE segundos, terminando antes
+    si se solicita una verificación con SIGUSR1.
+    """
+    global _CHECK_REQUESTED
+    deadline = time.monotonic() + seconds
+    while not _CHECK_REQUESTED:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(_WAKE_SLICE, remaining))
+    _CHECK_REQUESTED = False
+    logging.info("Verificación inmediata solicitada (SIGUSR1)")
+
+# Función para consultar varios dispositivos en paralelo
+def _query_devices(func, ip_addresses, username, password):
+    """
+    Ejecuta func(ip, username, password) para cada dispositivo de forma concurrente.
+    Retorna los resultados en el mismo orden que ip_addresses.
+    """
+    with ThreadPoolExecutor(max_workers=len(ip_addresses)) as executor:
+        futures = [executor.submit(func, ip, username, password) for ip in ip_addresses]
+        return [future.result() for future in futures]
+
+# Cortacircuitos para los cambios de frecuencia de un dispositivo
+class CircuitBreaker:
+    """
+    Tras failure_threshold cambios fallidos consecutivos el circuito se abre y no se
+    intentan más cambios durante reset_timeout segundos. Pasado ese tiempo queda
+    semiabierto: se permite un intento de prueba que lo cierra si tiene éxito o lo
+    vuelve a abrir si falla.
+    """
+    CLOSED = "cerrado"
+    OPEN = "abierto"
+    HALF_OPEN = "semiabierto"
+
+    def __init__(self, failure_threshold=3, reset_timeout=600):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        """
+        Indica si se permite un intento; pasa a semiabierto al terminar la espera.
+        """
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        return self.state != self.OPEN
+
+    def record(self, success):
+        """
+        Registra el resultado de un intento y actualiza el estado del circuito.
+        """
+        if success:
+            self.state = self.CLOSED
+            self.failures = 0
+            return
+
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def call(self, func, *args):
+        """
+        Ejecuta func(*args) si el circuito lo permite y registra el resultado.
+        Retorna None sin llamar a func si el circuito está abierto.
+        """
+        if not self.allow():
+            return None
+        try:
+            result = func(*args)
+        except Exception:
+            self.record(False)
+            raise
+        self.record(bool(result))
+        return result
+
+# Cortacircuitos de cambio de frecuencia por IP
+_BREAKERS = {}
+
+# Función para obtener el cortacircuitos de un dispositivo
+def _get_breaker(ip_address):
+    """
+    Retorna (creándolo si no existe) el cortacircuitos del dispositivo.
+    """
+    breaker = _BREAKERS.get(ip_address)
+    if breaker is None:
+        breaker = _BREAKERS[ip_address] = CircuitBreaker()
+    return breaker
+
+# Función para recuperar el estado del monitoreo guardado antes de un reinicio
+def _load_state():
+    """
+    Lee el estado guardado en _STATE_FILE. Retorna un diccionario vacío si no existe,
+    es más antiguo que _STATE_MAX_AGE o está dañado (JSON inválido o valores de otro
+    tipo); en este último caso se registra una advertencia y se ignora el archivo.
+    """
+    try:
+        with open(_STATE_FILE, 'rb') as f:
+            state = _json_loads(f.read())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning("Se ignora el archivo de estado %s: %s", _STATE_FILE, e)
+        return {}
+
+    if not (isinstance(state, dict)
+            and _is_number(state.get('saved_at'))
+            and type(state.get('consecutive_failures')) is int and state['consecutive_failures'] >= 0
+            and (state.get('current_frequency') is None or _is_number(state['current_frequency']))):
+        logging.warning("Se ignora el archivo de estado %s: contenido inválido", _STATE_FILE)
+        return {}
+    if time.time() - state['saved_at'] > _STATE_MAX_AGE:
+        return {}
+    return state
+
+# Función para validar un número leído del archivo de estado
+def _is_number(value):
+    """
+    Indica si el valor es un int o float (los booleanos de JSON no cuentan como número).
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+# Función para guardar el estado del monitoreo de forma atómica
+def _save_state(consecutive_failures, current_frequency):
+    """
+    Escribe el estado en un archivo temporal y lo reemplaza con os.replace, de modo que
+    un corte a mitad de la escritura nunca deja un archivo de estado incompleto.
+    """
+    state = {
+        'consecutive_failures': consecutive_failures,
+        'current_frequency': current_frequency,
+        'saved_at': time.time(),
+    }
+    tmp_path = f"{_STATE_FILE}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, _STATE_FILE)
+    except OSError as e:
+        logging.warning("No se pudo guardar el estado del monitoreo: %s", e)
 
 # Función principal para monitoreo continuo
 def monitor_and_switch():
     """Monitorea la calidad del enlace y cambia la frecuencia si es necesario"""
-    current_frequency = None
-    consecutive_failures = 0
+    # Retomar los fallos acumulados antes de un reinicio para no retrasar un cambio pendiente
+    state = _load_state()
+    current_frequency = state.get('current_frequency')
+    consecutive_failures = state.get('consecutive_failures', 0)
+    if consecutive_failures:
+        logging.info("Estado recuperado: %s verificaciones fallidas consecutivas", consecutive_failures)
+    saved_state = (consecutive_failures, current_frequency)
+    survey_future = None  # site survey lanzado en segundo plano antes de un cambio
+    check_interval = CHECK_INTERVAL
+    error_backoff = 1  # segundos; se duplica con cada error de red consecutivo hasta 60
 
     while True:
         try:
+            switched = False
             logging.info("Verificando estado del enlace...")
 
-            # Mostrar información detallada del enlace maestro
-            logging.info("Obteniendo información detallada del radio maestro...")
-            master_details = display_link_info(MASTER_IP, USERNAME, PASSWORD)
-
-            # Mostrar información detallada del enlace esclavo
-            logging.info("Obteniendo información detallada del radio esclavo...")
-            slave_details = display_link_info(SLAVE_IP, USERNAME, PASSWORD)
+            # Mostrar información detallada de ambos radios, consultados en paralelo
+            logging.info("Obteniendo información detallada de los radios maestro y esclavo...")
+            master_details, slave_details = _query_devices(
+                display_link_info, (MASTER_IP, SLAVE_IP), USERNAME, PASSWORD
+            )
 
             # Verificar si tenemos información válida para evaluar el enlace
-            if master_details and 'signal_level' in master_details and master_details['signal_level'] is not None:
+            if master_details and master_details.get('signal_level') is not None:
                 current_frequency = master_details.get('frequency')
                 signal_level = master_details.get('signal_level')
                 ccq = master_details.get('ccq')
-                tx_capacity = master_details.get('tx_capacity')
 
-                logging.info(f"Estado actual: Señal={signal_level}dBm, "
-                             f"CCQ={ccq}%, Frecuencia={current_frequency}MHz")
+                logging.info("Estado actual: Señal=%sdBm, CCQ=%s%%, Frecuencia=%sMHz",
+                             signal_level, ccq, current_frequency)
 
                 # Verificar si se requiere cambio de frecuencia
                 need_change = False
                 reasons = []
 
-                if signal_level is not None and signal_level < SIGNAL_THRESHOLD:
-                    reason = f"Señal ({signal_level} dBm) por debajo del umbral ({SIGNAL_THRESHOLD} dBm)"
-                    logging.warning(reason)
-                    reasons.append(reason)
-                    need_change = True
-
-                if ccq is not None and ccq < CCQ_THRESHOLD:
-                    reason = f"CCQ ({ccq}%) por debajo del umbral ({CCQ_THRESHOLD}%)"
-                    logging.warning(reason)
-                    reasons.append(reason)
-                    need_change = True
-
-                if tx_capacity is not None and tx_capacity < TX_CAPACITY_THRESHOLD:
-                    reason = f"Capacidad TX ({tx_capacity}%) por debajo del umbral ({TX_CAPACITY_THRESHOLD}%)"
-                    logging.warning(reason)
-                    reasons.append(reason)
-                    need_change = True
+                for key, label, threshold, unit in _THRESHOLDS:
+                    value = master_details.get(key)
+                    if value is not None and value < threshold:
+                        reason = _THRESHOLD_MSG.format(label=label, value=value, threshold=threshold, unit=unit)
+                        logging.warning(reason)
+                        reasons.append(reason)
+                        need_change = True
 
                 if need_change:
                     consecutive_failures += 1
                     reasons_str = ", ".join(reasons)
-                    logging.warning(f"Calidad del enlace por debajo del umbral ({consecutive_failures}/3): {reasons_str}")
-
-                    # Cambiar frecuencia después de 3 verificaciones fallidas consecutivas
-                    if consecutive_failures >= 3:
+                    logging.warning("Calidad del enlace por debajo del umbral (%s/3): %s", consecutive_failures, reasons_str)
+
+                    slave_breaker = _get_breaker(SLAVE_IP)
+                    master_breaker = _get_breaker(MASTER_IP)
+
+                    # A un fallo del cambio, lanzar el site survey en segundo plano para
+                    # que su resultado esté listo sin detener el monitoreo
+                    if USE_SITE_SURVEY and consecutive_failures == 2 and survey_future is None:
+                        survey_future = _PREFETCH_POOL.submit(_site_survey, MASTER_IP, USERNAME, PASSWORD)
+
+                    # Cambiar frecuencia después de 3 verificaciones fallidas consecutivas,
+                    # salvo que los cambios anteriores hayan fallado repetidamente
+                    if consecutive_failures >= 3 and not (slave_breaker.allow() and master_breaker.allow()):
+                        logging.error("Circuito abierto por cambios de frecuencia fallidos repetidos; "
+                                      f"se mantiene la frecuencia actual ({current_frequency}MHz) y se omite el cambio")
+                        survey_future = None
+                    elif consecutive_failures >= 3:
                         logging.warning("Iniciando cambio de frecuencia...")
 
                         # Encontrar la mejor frecuencia
-                        best_frequency = find_best_frequency(MASTER_IP, USERNAME, PASSWORD, current_frequency)
+                        best_frequency = find_best_frequency(MASTER_IP, USERNAME, PASSWORD, current_frequency, survey_future)
+                        survey_future = None
 
-                        logging.info(f"Cambiando frecuencia de {current_frequency}MHz a {best_frequency}MHz")
+                        logging.info("Cambiando frecuencia de %sMHz a %sMHz", current_frequency, best_frequency)
 
                         # Cambiar frecuencia primero en el esclavo y luego en el maestro
-                        # (esto minimiza el tiempo de desconexión)
-                        slave_success = change_frequency(SLAVE_IP, USERNAME, PASSWORD, best_frequency)
-                        time.sleep(15)  # Esperar a que el esclavo se estabilice
+                        # (esto minimiza el tiempo de desconexión); mientras tanto se deja
+                        # preparado el formulario del maestro
+                        master_ready = _PREFETCH_POOL.submit(_prepare_frequency_change, MASTER_IP, USERNAME, PASSWORD)
+                        slave_success = slave_breaker.call(change_frequency, SLAVE_IP, USERNAME, PASSWORD, best_frequency)
 
                         if slave_success:
-                            master_success = change_frequency(MASTER_IP, USERNAME, PASSWORD, best_frequency)
+                            # change_frequency ya confirmó el esclavo (o agotó VERIFY_TIMEOUT si dejó de
+                            # responder al perder el enlace): cambiar el maestro sin otra espera
+                            master_ready.result()
+                            master_success = master_breaker.call(change_frequency, MASTER_IP, USERNAME, PASSWORD, best_frequency)
 
                             if master_success:
                                 logging.info("Cambio de frecuencia completado exitosamente")
                                 consecutive_failures = 0
+                                current_frequency = best_frequency
+                                switched = True
                             else:
                                 logging.error("Error al cambiar la frecuencia del maestro")
                         else:
@@ -924,66 +1681,63 @@ def monitor_and_switch():
                     if consecutive_failures > 0:
                         logging.info("Enlace estable, reiniciando contador de fallos")
                     consecutive_failures = 0
+                    # Descartar un survey adelantado: ya no habrá cambio
+                    if survey_future is not None:
+                        survey_future.cancel()
+                        survey_future = None
             else:
                 logging.error("No se pudo obtener información válida del enlace")
                 consecutive_failures += 1
 
-            # Esperar antes de la próxima verificación
-            logging.info(f"Esperando {CHECK_INTERVAL} segundos hasta la próxima verificación...")
-            time.sleep(CHECK_INTERVAL)
-
-        except Exception as e:
-            logging.error(f"Error en el ciclo de monitoreo: {str(e)}")
-            time.sleep(60)  # Esperar un minuto antes de reintentar
+            # Guardar el estado solo cuando cambia
+            if (consecutive_failures, current_frequency) != saved_state:
+                saved_state = (consecutive_failures, current_frequency)
+                _save_state(*saved_state)
+
+            # Esperar antes de la próxima verificación (intervalo adaptativo)
+            check_interval = _next_check_interval(master_details, check_interval)
+            if switched:
+                # Confirmar pronto que el enlace quedó bien en la nueva frecuencia
+                check_interval = SWITCH_CONFIRM_DELAY
+            elif consecutive_failures:
+                # Con fallos acumulados, acortar la espera a la mitad por cada fallo (hasta 1/8)
+                check_interval = min(check_interval, max(MIN_CHECK_INTERVAL, CHECK_INTERVAL / (1 << min(consecutive_failures, 3))))
+            error_backoff = 1
+            logging.info("Esperando %.0f segundos hasta la próxima verificación...", check_interval)
+            _sleep_until_next_check(check_interval)
+
+        except (requests.exceptions.RequestException, OSError) as e:
+            # Errores de red transitorios: reintentar con espera exponencial (1, 2, 4... hasta 60 s);
+            # cualquier otro error detiene el servicio para que systemd lo reinicie
+            logging.error("Error en el ciclo de monitoreo: %s (reintentando en %s s)", e, error_backoff)
+            _sleep_until_next_check(error_backoff)
+            error_backoff = min(error_backoff * 2, 60)
 
 # Función mejorada para mostrar estado actual sin ejecutar el servicio completo
 def show_current_status():
     """Muestra el estado actual de los enlaces sin iniciar el servicio completo"""
     print("=== ESTADO ACTUAL DE LOS ENLACES PTP ===")
-    print("Obteniendo información del radio maestro...")
-    master_info = display_link_info(MASTER_IP, USERNAME, PASSWORD)
-
-    print("\nObteniendo información del radio esclavo...")
-    slave_info = display_link_info(SLAVE_IP, USERNAME, PASSWORD)
+    print("Obteniendo información de los radios maestro y esclavo...")
+    # Ambos radios se consultan en paralelo (cada uno con su sesión persistente)
+    master_info, slave_info = _query_devices(display_link_info, (MASTER_IP, SLAVE_IP), USERNAME, PASSWORD)
 
     # Verificar si hay problemas potenciales
     if master_info:
         problems_found = False
 
-        if 'signal_level' in master_info and master_info['signal_level'] is not None:
-            try:
-                signal = float(master_info['signal_level'])
-                if signal < SIGNAL_THRESHOLD:
-                    print(f"\n⚠️ ADVERTENCIA: Señal ({signal} dBm) por debajo del umbral ({SIGNAL_THRESHOLD} dBm)")
-                    problems_found = True
-            except (ValueError, TypeError):
-                pass
-
-        if 'ccq' in master_info and master_info['ccq'] is not None:
-            try:
-                ccq = float(master_info['ccq'])
-                if ccq < CCQ_THRESHOLD:
-                    print(f"\n⚠️ ADVERTENCIA: CCQ ({ccq}%) por debajo del umbral ({CCQ_THRESHOLD}%)")
-                    problems_found = True
-            except (ValueError, TypeError):
-                pass
-
-        if 'tx_capacity' in master_info and master_info['tx_capacity'] is not None:
-            try:
-                tx_capacity = float(master_info['tx_capacity'])
-                if tx_capacity < TX_CAPACITY_THRESHOLD:
-                    print(f"\n⚠️ ADVERTENCIA: Capacidad TX ({tx_capacity}%) por debajo del umbral ({TX_CAPACITY_THRESHOLD}%)")
-                    problems_found = True
-            except (ValueError, TypeError):
-                pass
+        for key, label, threshold, unit in _THRESHOLDS:
+            value = master_info.get(key)
+            if value is not None and value < threshold:
+                print("\n⚠️ ADVERTENCIA: " + _THRESHOLD_MSG.format(label=label, value=value, threshold=threshold, unit=unit))
+                problems_found = True
 
         if not problems_found:
             print("\n✅ El enlace parece estar funcionando correctamente. No se detectaron problemas.")
 
     print("\n=== INFORMACIÓN DE FRECUENCIAS DISPONIBLES ===")
     print(f"Frecuencias configuradas: {AVAILABLE_FREQUENCIES}")
-    if master_info and 'frequency' in master_info and master_info['frequency'] is not None:
-        current_freq = master_info['frequency']
+    current_freq = master_info.get('frequency') if master_info else None
+    if current_freq is not None:
         print(f"Frecuencia actual: {current_freq} MHz")
     print("================================================")
 
@@ -992,27 +1746,53 @@ def test_data_extraction():
     """Prueba diferentes métodos de extracción de datos de los dispositivos"""
     print("=== PRUEBA DE EXTRACCIÓN DE DATOS ===")
 
-    print(f"\nDispositivo maestro ({MASTER_IP}):")
-    master_data = get_device_status(MASTER_IP, USERNAME, PASSWORD)
+    # Consultar ambos dispositivos en paralelo y mostrar los resultados en orden
+    master_data, slave_data = _query_devices(get_device_status, (MASTER_IP, SLAVE_IP), USERNAME, PASSWORD)
 
-    if master_data:
-        print("✅ Datos extraídos exitosamente:")
-        for key, value in master_data.items():
-            print(f"  {key}: {value}")
-    else:
-        print("❌ No se pudieron extraer datos del maestro")
+    # Armar el reporte de cada dispositivo y escribirlo de una sola vez
+    lines = []
+    for label, ip_address, data in (("maestro", MASTER_IP, master_data), ("esclavo", SLAVE_IP, slave_data)):
+        lines.append(f"\nDispositivo {label} ({ip_address}):")
+        if data:
+            lines.append("✅ Datos extraídos exitosamente:")
+            lines.extend(f"  {key}: {value}" for key, value in data.items())
+        else:
+            lines.append(f"❌ No se pudieron extraer datos del {label}")
+    print("\n".join(lines))
 
-    print(f"\nDispositivo esclavo ({SLAVE_IP}):")
-    slave_data = get_device_status(SLAVE_IP, USERNAME, PASSWORD)
+    print("\n=== FIN DE PRUEBA DE EXTRACCIÓN ===")
 
-    if slave_data:
-        print("✅ Datos extraídos exitosamente:")
-        for key, value in slave_data.items():
-            print(f"  {key}: {value}")
-    else:
-        print("❌ No se pudieron extraer datos del esclavo")
+# Función para consultar el estado de un dispositivo midiendo cuánto tarda
+def _timed_status(ip_address, username, password):
+    """
+    Consulta el estado sin usar la caché y retorna (estado, segundos transcurridos).
+    """
+    start = time.monotonic()
+    status = get_device_status(ip_address, username, password, force_refresh=True)
+    return status, time.monotonic() - start
+
+# Función para probar la consulta en paralelo de los dispositivos
+def parallel_test():
+    """Consulta ambos dispositivos en paralelo dos veces y muestra los tiempos de cada consulta"""
+    print("=== PRUEBA DE CONSULTA EN PARALELO ===")
+
+    # La primera ronda incluye el login; la segunda reutiliza las sesiones y conexiones abiertas
+    for round_name in ("Primera consulta (con login)", "Segunda consulta (sesión reutilizada)"):
+        start = time.monotonic()
+        results = _query_devices(_timed_status, (MASTER_IP, SLAVE_IP), USERNAME, PASSWORD)
+        total = time.monotonic() - start
+
+        lines = [f"\n{round_name}:"]
+        for label, ip_address, (status, elapsed) in zip(("maestro", "esclavo"), (MASTER_IP, SLAVE_IP), results):
+            if status:
+                lines.append(f"✅ {label} ({ip_address}): {elapsed:.2f} s, frecuencia {status.get('frequency')} MHz")
+            else:
+                lines.append(f"❌ {label} ({ip_address}): {elapsed:.2f} s, sin datos")
+        sequential = sum(elapsed for _, elapsed in results)
+        lines.append(f"Tiempo total: {total:.2f} s (en serie serían ~{sequential:.2f} s)")
+        print("\n".join(lines))
 
-    print("\n=== FIN DE PRUEBA DE EXTRACCIÓN ===")
+    print("\n=== FIN DE PRUEBA EN PARALELO ===")
 
 # Función para ejecutar como servicio
 def run_as_service():
@@ -1020,6 +1800,11 @@ def run_as_service():
     logging.info("Iniciando servicio de cambio automático de frecuencia")
     print("Servicio de cambio automático de frecuencia iniciado")
     print(f"Registros disponibles en: {log_file}")
+
+    # `kill -USR1 <pid>` fuerza una verificación inmediata
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, _request_check)
+
     monitor_and_switch()
 
 # Punto de entrada principal
@@ -1035,80 +1820,86 @@ if __name__ == "__main__":
         elif sys.argv[1] == '--extract':
             # Mostrar ejemplo de extracción de datos con diferentes métodos
             test_data_extraction()
+        elif sys.argv[1] == '--parallel-test':
+            # Medir la consulta concurrente de ambos dispositivos
+            parallel_test()
         elif sys.argv[1] == '--force-switch':
             # Forzar un cambio de frecuencia
             if len(sys.argv) > 2:
                 try:
                     target_freq = float(sys.argv[2])
-                    if target_freq in AVAILABLE_FREQUENCIES:
-                        print(f"Forzando cambio de frecuencia a {target_freq} MHz...")
+                    if target_freq in _FREQ_SET:
+                        logging.info("Forzando cambio de frecuencia a %s MHz...", target_freq)
 
                         # Primera forma: cambiar en esclavo primero, luego en maestro
-                        print("Intentando cambiar frecuencia en el dispositivo esclavo...")
+                        # (el formulario del maestro se prepara mientras cambia el esclavo)
+                        logging.info("Intentando cambiar frecuencia en el dispositivo esclavo...")
+                        master_ready = _PREFETCH_POOL.submit(_prepare_frequency_change, MASTER_IP, USERNAME, PASSWORD)
                         slave_success = change_frequency(SLAVE_IP, USERNAME, PASSWORD, target_freq)
+                        master_ready.result()
 
                         if slave_success:
-                            print(f"✅ Frecuencia del esclavo cambiada exitosamente")
-                            time.sleep(15)
-                            print("Intentando cambiar frecuencia en el dispositivo maestro...")
+                            logging.info("✅ Frecuencia del esclavo cambiada exitosamente")
+                            logging.info("Intentando cambiar frecuencia en el dispositivo maestro...")
                             master_success = change_frequency(MASTER_IP, USERNAME, PASSWORD, target_freq)
 
                             if master_success:
-                                print(f"✅ Frecuencia del maestro cambiada exitosamente")
-                                print(f"✅ El enlace ahora opera en {target_freq} MHz")
+                                logging.info("✅ Frecuencia del maestro cambiada exitosamente")
+                                logging.info("✅ El enlace ahora opera en %s MHz", target_freq)
                             else:
-                                print(f"❌ Error al cambiar frecuencia del maestro")
-                                print("⚠️ El esclavo se cambió pero el maestro no. Puede haber desconexión.")
+                                logging.error("❌ Error al cambiar frecuencia del maestro")
+                                logging.warning("⚠️ El esclavo se cambió pero el maestro no. Puede haber desconexión.")
 
                                 # Intentar revertir el cambio en el esclavo
-                                print("Intentando restaurar frecuencia original en el esclavo...")
+                                logging.info("Intentando restaurar frecuencia original en el esclavo...")
                                 original_freq = None
                                 try:
                                     status = get_device_status(MASTER_IP, USERNAME, PASSWORD)
-                                    if status and 'frequency' in status:
-                                        original_freq = status['frequency']
+                                    if status:
+                                        original_freq = status.get('frequency')
                                 except Exception:
                                     pass
 
                                 if original_freq:
                                     revert_success = change_frequency(SLAVE_IP, USERNAME, PASSWORD, original_freq)
                                     if revert_success:
-                                        print(f"✅ Frecuencia del esclavo restaurada a {original_freq} MHz")
+                                        logging.info("✅ Frecuencia del esclavo restaurada a %s MHz", original_freq)
                                     else:
-                                        print("❌ No se pudo restaurar la frecuencia del esclavo")
+                                        logging.error("❌ No se pudo restaurar la frecuencia del esclavo")
                         else:
-                            print(f"❌ Error al cambiar frecuencia del esclavo")
-                            print("⚠️ Intentando método alternativo de cambio...")
+                            logging.error("❌ Error al cambiar frecuencia del esclavo")
+                            logging.warning("⚠️ Intentando método alternativo de cambio...")
 
                             # Segunda forma: intentar cambiar en maestro primero
-                            print("Intentando cambiar frecuencia en el dispositivo maestro primero...")
+                            logging.info("Intentando cambiar frecuencia en el dispositivo maestro primero...")
                             master_success = change_frequency(MASTER_IP, USERNAME, PASSWORD, target_freq)
 
                             if master_success:
-                                print(f"✅ Frecuencia del maestro cambiada exitosamente")
-                                time.sleep(15)
-                                print("Intentando cambiar frecuencia en el dispositivo esclavo...")
+                                logging.info("✅ Frecuencia del maestro cambiada exitosamente")
+                                logging.info("Intentando cambiar frecuencia en el dispositivo esclavo...")
                                 slave_success = change_frequency(SLAVE_IP, USERNAME, PASSWORD, target_freq)
 
                                 if slave_success:
-                                    print(f"✅ Frecuencia del esclavo cambiada exitosamente")
-                                    print(f"✅ El enlace ahora opera en {target_freq} MHz")
+                                    logging.info("✅ Frecuencia del esclavo cambiada exitosamente")
+                                    logging.info("✅ El enlace ahora opera en %s MHz", target_freq)
                                 else:
-                                    print(f"❌ Error al cambiar frecuencia del esclavo")
-                                    print("⚠️ El maestro se cambió pero el esclavo no. Puede haber desconexión.")
+                                    logging.error("❌ Error al cambiar frecuencia del esclavo")
+                                    logging.warning("⚠️ El maestro se cambió pero el esclavo no. Puede haber desconexión.")
                             else:
-                                print("❌ No se pudo cambiar la frecuencia en ninguno de los dispositivos")
+                                logging.error("❌ No se pudo cambiar la frecuencia en ninguno de los dispositivos")
                     else:
-                        print(f"❌ Frecuencia {target_freq} no está en la lista de frecuencias disponibles")
-                        print(f"Frecuencias disponibles: {AVAILABLE_FREQUENCIES}")
+                        logging.error("❌ Frecuencia %s no está en la lista de frecuencias disponibles", target_freq)
+                        logging.info("Frecuencias disponibles: %s", AVAILABLE_FREQUENCIES)
                 except ValueError:
-                    print(f"❌ Frecuencia inválida: {sys.argv[2]}")
+                    logging.error("❌ Frecuencia inválida: %s", sys.argv[2])
             else:
-                print("❌ Debe especificar una frecuencia")
-                print(f"Uso: python frequency_switcher.py --force-switch FRECUENCIA")
-                print(f"Frecuencias disponibles: {AVAILABLE_FREQUENCIES}")
+                logging.error("❌ Debe especificar una frecuencia")
+                logging.info("Uso: python frequency_switcher.py --force-switch FRECUENCIA")
+                logging.info("Frecuencias disponibles: %s", AVAILABLE_FREQUENCIES)
         elif sys.argv[1] == '--debug-forms':
-            # Analizar y mostrar todos los formularios disponibles en el dispositivo
+            # Analizar y mostrar todos los formularios disponibles en el dispositivo.
+            # BeautifulSoup solo se usa en este diagnóstico: importarlo aquí evita cargarlo al iniciar el servicio
+            from bs4 import BeautifulSoup, SoupStrainer
             ip_to_debug = MASTER_IP
             if len(sys.argv) > 2:
                 if sys.argv[2] == 'slave':
@@ -1120,9 +1911,6 @@ if __name__ == "__main__":
 
             print(f"Analizando formularios en {ip_to_debug}...")
 
-            # Deshabilitar advertencias SSL
-            requests.packages.urllib3.disable_warnings()
-
             # Crear una sesión
             session = requests.Session()
             session.verify = False
@@ -1132,22 +1920,30 @@ if __name__ == "__main__":
             login_data = {"username": USERNAME, "password": PASSWORD}
 
             try:
-                login_response = session.post(login_url, data=login_data, timeout=15)
+                login_response = session.post(login_url, data=login_data, timeout=(CONNECT_TIMEOUT, 15))
                 print(f"Login: status={login_response.status_code}")
 
                 # Lista de páginas a analizar
                 pages = ["/", "/link.cgi", "/spectral.cgi", "/main.cgi", "/wireless.cgi", "/advanced.cgi"]
 
-                for page in pages:
+                # Descargar todas las páginas en paralelo; se analizan después en orden
+                with ThreadPoolExecutor(max_workers=len(pages)) as executor:
+                    page_futures = [
+                        (page, executor.submit(session.get, f"https://{ip_to_debug}{page}", timeout=(CONNECT_TIMEOUT, 15)))
+                        for page in pages
+                    ]
+
+                for page, page_future in page_futures:
                     try:
                         url = f"https://{ip_to_debug}{page}"
                         print(f"\nAnalizando {url}...")
 
-                        response = session.get(url, timeout=15)
+                        response = page_future.result()
                         if response.status_code == 200:
                             print(f"✅ Página accesible")
 
-                            soup = BeautifulSoup(response.text, 'html.parser')
+                            # Solo se construyen los subárboles <form> de la página
+                            soup = BeautifulSoup(response.content, 'lxml', parse_only=SoupStrainer('form'))
                             forms = soup.find_all('form')
 
                             print(f"Encontrados {len(forms)} formularios")
@@ -1182,7 +1978,7 @@ if __name__ == "__main__":
                 print(f"❌ Error general: {str(e)}")
         else:
             print(f"Argumento desconocido: {sys.argv[1]}")
-            print("Uso: python frequency_switcher.py [--status|--test|--extract|--force-switch FRECUENCIA|--debug-forms [master|slave|IP]]")
+            print("Uso: python frequency_switcher.py [--status|--test|--extract|--parallel-test|--force-switch FRECUENCIA|--debug-forms [master|slave|IP]]")
     else:
         # Ejecutar el servicio completo
         run_as_service()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Pruebas de regresión de frequency_switcher (sin equipos reales: las sesiones HTTP se simulan)
+Ejecutar con: python -m unittest test_frequency_switcher
+"""
+import atexit
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+# El script configura un log junto a sí mismo al importarse; configurar antes el logging
+# raíz hace que su basicConfig no tenga efecto y el log de las pruebas quede en un temporal
+_LOG_DIR = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, _LOG_DIR, True)
+logging.basicConfig(filename=os.path.join(_LOG_DIR, 'frequency_switcher.log'), level=logging.INFO)
+
+import frequency_switcher as fs  # noqa: E402
+
+LOGIN_FORM = b'<html><form action="login.cgi"><input name="username"><input name="password"></form></html>'
+
+
+class _RawBody(io.BytesIO):
+    """Cuerpo en streaming con la firma de urllib3 (read acepta decode_content)."""
+
+    def read(self, size=-1, decode_content=False):
+        return super().read(size)
+
+
+# Función para construir una respuesta HTTP simulada con cuerpo en streaming
+def _fake_response(body, url="https://1.2.3.4/status.cgi", status_code=200):
+    """
+    Retorna un objeto con la interfaz de requests.Response usada por el script.
+    """
+    response = mock.MagicMock()
+    response.url = url
+    response.status_code = status_code
+    response.content = body
+    response.raw = _RawBody(body)
+    response.__enter__.return_value = response
+    return response
+
+
+class IsolatedTestCase(unittest.TestCase):
+    """Redirige los volcados de depuración a un directorio temporal para no ensuciar el árbol."""
+
+    def setUp(self):
+        debug_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, debug_root, True)
+        patcher = mock.patch.object(fs, '_DEBUG_ROOT', debug_root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class FetchEndpointBodyTest(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        fs._SESSIONS.clear()
+
+    def test_inline_login_page_triggers_relogin(self):
+        status = b'{"wireless": {"signal": -60}}'
+        session = mock.Mock()
+        session.get.side_effect = [_fake_response(LOGIN_FORM), _fake_response(status)]
+        with mock.patch.object(fs, '_login', return_value=True) as login:
+            body = fs._fetch_endpoint_body(session, '1.2.3.4', 'ubnt', 'pw', 'https://1.2.3.4/status.cgi')
+        self.assertEqual(body, status)
+        self.assertEqual(login.call_count, 1)
+
+    def test_failed_relogin_evicts_session(self):
+        session = mock.Mock()
+        session.get.side_effect = [_fake_response(LOGIN_FORM)]
+        fs._SESSIONS['1.2.3.4'] = session
+        with mock.patch.object(fs, '_login', return_value=False):
+            body = fs._fetch_endpoint_body(session, '1.2.3.4', 'ubnt', 'pw', 'https://1.2.3.4/status.cgi')
+        self.assertIn(b'name="password"', body)
+        self.assertNotIn('1.2.3.4', fs._SESSIONS)
+
+
+class LoginLockTest(unittest.TestCase):
+
+    def test_concurrent_logins_on_one_device_are_serialized(self):
+        active = []
+        overlaps = []
+
+        def attempt(session, ip_address, username, password, probe):
+            active.append(ip_address)
+            if len(active) > 1:
+                overlaps.append(list(active))
+            time.sleep(0.05)
+            active.remove(ip_address)
+            return True
+
+        with mock.patch.object(fs, '_login_attempt', side_effect=attempt):
+            threads = [threading.Thread(target=fs._login, args=(mock.Mock(), '1.2.3.4', 'ubnt', 'pw'))
+                       for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(overlaps, [])
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(fs.time, 'monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = fs.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    def _open(self):
+        failing = mock.Mock(return_value=False)
+        for _ in range(2):
+            self.breaker.call(failing)
+        self.assertEqual(self.breaker.state, fs.CircuitBreaker.OPEN)
+
+    def test_open_circuit_skips_calls(self):
+        self._open()
+        func = mock.Mock(return_value=True)
+        self.assertIsNone(self.breaker.call(func))
+        func.assert_not_called()
+
+    def test_half_open_success_closes(self):
+        self._open()
+        self.now += 59
+        self.assertFalse(self.breaker.allow())
+        self.now += 1
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, fs.CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.call(mock.Mock(return_value=True)))
+        self.assertEqual(self.breaker.state, fs.CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 0)
+
+    def test_half_open_failure_reopens(self):
+        self._open()
+        self.now += 60
+        self.breaker.call(mock.Mock(return_value=False))
+        self.assertEqual(self.breaker.state, fs.CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.opened_at, self.now)
+        self.assertFalse(self.breaker.allow())
+
+    def test_exception_counts_as_failure(self):
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                self.breaker.call(mock.Mock(side_effect=RuntimeError("sin conexión")))
+        self.assertEqual(self.breaker.state, fs.CircuitBreaker.OPEN)
+
+
+class StatusCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        fs._STATUS_CACHE.clear()
+        fs._STATUS_INFLIGHT.clear()
+        self.addCleanup(fs._STATUS_CACHE.clear)
+        self.addCleanup(fs._STATUS_INFLIGHT.clear)
+        patcher = mock.patch.object(fs, '_fetch_device_status', return_value={'frequency': 5710.0})
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fresh_entry_is_reused(self):
+        fs._STATUS_CACHE['1.2.3.4'] = (time.monotonic(), {'frequency': 5665.0})
+        self.assertEqual(fs.get_device_status('1.2.3.4', 'ubnt', 'pw'), {'frequency': 5665.0})
+        self.fetch.assert_not_called()
+
+    def test_expired_entry_is_refetched(self):
+        fs._STATUS_CACHE['1.2.3.4'] = (time.monotonic() - fs.STATUS_CACHE_TTL - 1, {'frequency': 5665.0})
+        self.assertEqual(fs.get_device_status('1.2.3.4', 'ubnt', 'pw'), {'frequency': 5710.0})
+        self.fetch.assert_called_once_with('1.2.3.4', 'ubnt', 'pw')
+
+    def test_force_refresh_bypasses_cache(self):
+        fs._STATUS_CACHE['1.2.3.4'] = (time.monotonic(), {'frequency': 5665.0})
+        self.assertEqual(fs.get_device_status('1.2.3.4', 'ubnt', 'pw', force_refresh=True), {'frequency': 5710.0})
+        self.fetch.assert_called_once_with('1.2.3.4', 'ubnt', 'pw')
+
+    def test_concurrent_callers_share_one_query(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch(ip_address, username, password):
+            started.set()
+            release.wait(5)
+            return {'frequency': 5710.0}
+
+        self.fetch.side_effect = slow_fetch
+        results = []
+        callers = [threading.Thread(target=lambda: results.append(fs.get_device_status('1.2.3.4', 'ubnt', 'pw')))
+                   for _ in range(3)]
+        callers[0].start()
+        self.assertTrue(started.wait(5))
+        for caller in callers[1:]:
+            caller.start()
+        time.sleep(0.1)  # dar tiempo a que los demás esperen la consulta en curso
+        release.set()
+        for caller in callers:
+            caller.join(5)
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(results, [{'frequency': 5710.0}] * 3)
+
+    def test_failed_query_is_not_left_in_flight(self):
+        self.fetch.side_effect = RuntimeError("sin conexión")
+        with self.assertRaises(RuntimeError):
+            fs.get_device_status('1.2.3.4', 'ubnt', 'pw')
+        self.assertNotIn('1.2.3.4', fs._STATUS_INFLIGHT)
+
+        self.fetch.side_effect = None
+        self.assertEqual(fs.get_device_status('1.2.3.4', 'ubnt', 'pw'), {'frequency': 5710.0})
+        self.assertEqual(self.fetch.call_count, 2)
+
+
+class ExtractWithRegexTest(unittest.TestCase):
+
+    def test_fields_do_not_hide_each_other(self):
+        # La coincidencia perezosa de la señal abarca el primer "ccq 50%"; el CCQ debe seguir siendo 50
+        found = fs._extract_with_regex(b'<td>signal: ccq 50% -60 dbm</td><td>ccq 90%</td>')
+        self.assertEqual(found['signal_level'], -60.0)
+        self.assertEqual(found['ccq'], 50.0)
+
+
+class SleepUntilNextCheckTest(unittest.TestCase):
+
+    def test_requested_check_ends_wait(self):
+        fs._request_check(None, None)
+        with mock.patch.object(fs.time, 'sleep') as sleep:
+            fs._sleep_until_next_check(300)
+        sleep.assert_not_called()
+        self.assertFalse(fs._CHECK_REQUESTED)
+
+
+class LoadStateTest(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        patcher = mock.patch.object(fs, '_STATE_FILE', self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(os.remove, self.path)
+
+    def _write(self, content):
+        with open(self.path, 'w') as f:
+            f.write(content)
+
+    def test_valid_state_is_loaded(self):
+        self._write('{"consecutive_failures": 2, "current_frequency": 5710.0, "saved_at": %f}' % time.time())
+        self.assertEqual(fs._load_state()['consecutive_failures'], 2)
+
+    def test_invalid_values_are_ignored(self):
+        now = time.time()
+        for content in ('{"consecutive_failures": 2, "saved_at": "ayer"}',
+                        '{"consecutive_failures": "2", "saved_at": %f}' % now,
+                        '{"consecutive_failures": 2, "current_frequency": [5710], "saved_at": %f}' % now,
+                        '[1, 2]',
+                        '{truncado'):
+            self._write(content)
+            self.assertEqual(fs._load_state(), {}, content)
+
+
+class WaitForFrequencyTest(IsolatedTestCase):
+
+    def test_unreachable_radio_returns_within_timeout(self):
+        # Sin respuesta TCP no se recorren los endpoints HTTP (cada uno con sus reintentos)
+        with mock.patch.object(fs, '_tcp_up', return_value=False), \
+                mock.patch.object(fs, '_get_frequency_fast') as fast, \
+                mock.patch.object(fs, 'get_device_status') as status:
+            start = time.monotonic()
+            fs._wait_for_frequency('1.2.3.4', 'ubnt', 'pw', 5665, timeout=1)
+            elapsed = time.monotonic() - start
+        self.assertLess(elapsed, 1.5)
+        fast.assert_not_called()
+        status.assert_not_called()
+
+
+class ChangeFrequencyTest(IsolatedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        fs._FORM_CACHE['1.2.3.4'] = {
+            "url": "https://1.2.3.4/link.cgi",
+            "fields": ("chan_freq",),
+            "data": {"token": "t"},
+            "csrf_token": "t",
+        }
+
+    def tearDown(self):
+        fs._FORM_CACHE.clear()
+
+    def test_comment_only_response_still_verifies(self):
+        # Una respuesta sin elementos HTML no debe abortar el cambio antes de verificarlo
+        session = mock.Mock()
+        session.post.return_value = _fake_response(b'<!-- ok -->', url="https://1.2.3.4/link.cgi")
+        with mock.patch.object(fs, '_get_session', return_value=session), \
+                mock.patch.object(fs, '_wait_for_frequency', return_value=True) as wait:
+            self.assertTrue(fs.change_frequency('1.2.3.4', 'ubnt', 'pw', 5665))
+        wait.assert_called_once_with('1.2.3.4', 'ubnt', 'pw', 5665)
+
+    def _assert_stale_form_rediscovered(self, rejection):
+        fresh_form = {
+            "url": "https://1.2.3.4/wireless.cgi",
+            "fields": ("freq",),
+            "data": {"token": "nuevo"},
+            "csrf_token": "nuevo",
+        }
+        session = mock.Mock()
+        session.post.side_effect = [rejection, _fake_response(b'<html>ok</html>', url=fresh_form["url"])]
+        with mock.patch.object(fs, '_get_session', return_value=session), \
+                mock.patch.object(fs, '_login', return_value=True) as login, \
+                mock.patch.object(fs, '_discover_frequency_form', return_value=fresh_form) as discover, \
+                mock.patch.object(fs, '_wait_for_frequency', return_value=True):
+            self.assertTrue(fs.change_frequency('1.2.3.4', 'ubnt', 'pw', 5665))
+        login.assert_called_once()
+        discover.assert_called_once()
+        self.assertIs(fs._FORM_CACHE['1.2.3.4'], fresh_form)
+        self.assertEqual(session.post.call_args[0][0], fresh_form["url"])
+        self.assertEqual(session.post.call_args[1]['data']['freq'], '5665')
+
+    def test_cached_form_answered_with_login_page_is_rediscovered(self):
+        self._assert_stale_form_rediscovered(_fake_response(LOGIN_FORM, url="https://1.2.3.4/login.cgi"))
+
+    def test_cached_form_answered_with_4xx_is_rediscovered(self):
+        self._assert_stale_form_rediscovered(_fake_response(b'nf', url="https://1.2.3.4/link.cgi", status_code=404))
+
+    def test_find_confirm_form_without_elements(self):
+        for body in (b'', b'<!-- ok -->', b'<?xml version="1.0"?>'):
+            self.assertIsNone(fs._find_confirm_form(body))
+
+
+if __name__ == '__main__':
+    unittest.main()